@@ -0,0 +1,147 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pbirest
+import pbirest.aio
+from pbirest.testing import StandInConfig, StandInServer
+
+def percentile(values: list, fraction: float) -> float:
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+def measure(name: str, operation, iterations: int, metrics: pbirest.Metrics) -> dict:
+    operation()
+    metrics.reset()
+    latencies = []
+
+    started = time.perf_counter()
+    for index in range(iterations):
+        call_started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - call_started)
+    seconds = time.perf_counter() - started
+
+    # tracemalloc slows every allocation down, so memory is measured on a separate, untimed call
+    snapshot = metrics.snapshot()
+    tracemalloc.start()
+    operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    requests = sum(snapshot["responses"].values())
+    transferred = sum(snapshot["bytes_received"].values()) + sum(snapshot["bytes_sent"].values())
+    return {
+        "operation": name,
+        "iterations": iterations,
+        "requests": requests,
+        "requests_per_second": requests / seconds if seconds else 0.0,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mb_per_second": transferred / seconds / 1048576 if seconds else 0.0,
+        "peak_memory_mb": peak / 1048576,
+        "retries": sum(snapshot["retries"].values())
+    }
+
+def serve(config: StandInConfig, urls: multiprocessing.Queue) -> None:
+    server = StandInServer(config).start()
+    urls.put(server.url)
+    server.thread.join()
+
+def operations(directory: str, export_size: int) -> list:
+    workspace_ids = [workspace["id"] for workspace in pbirest.get_workspaces()]
+    workspace_id = workspace_ids[0]
+    report_id = pbirest.get_reports(workspace_id)[0]["id"]
+    pbix = os.path.join(directory, "in.pbix")
+    with open(pbix, "wb") as file: file.write(os.urandom(export_size))
+
+    def fan_out_async() -> None:
+        async def run() -> list:
+            return await asyncio.gather(*[pbirest.aio.get_reports(workspace_id) for workspace_id in workspace_ids])
+        asyncio.run(run())
+
+    return [
+        ("get_workspaces", lambda: pbirest.get_workspaces()),
+        ("get_reports", lambda: pbirest.get_reports(workspace_id)),
+        ("get_reports_fan_out_serial", lambda: [pbirest.get_reports(workspace_id) for workspace_id in workspace_ids]),
+        ("get_reports_fan_out_async", fan_out_async),
+        ("get_audit_logs", lambda: pbirest.get_audit_logs("2020-01-01 00:00:00", "2020-01-01 23:59:59")),
+        ("export_audit_logs", lambda: pbirest.export_audit_logs("2020-01-01 00:00:00", "2020-01-01 23:59:59", os.path.join(directory, "events.jsonl"))),
+        ("backfill_audit_logs_7_days", lambda: pbirest.backfill_audit_logs("2020-01-01 00:00:00", "2020-01-07 23:59:59", workers = 7)),
+        ("export_report", lambda: pbirest.export_report(workspace_id, report_id, os.path.join(directory, "out.pbix"), resume = False)),
+        ("import_report", lambda: pbirest.import_report(workspace_id, "Benchmark", pbix)),
+        ("crawl_inventory", lambda: pbirest.crawl_inventory(workers = 16))
+    ]
+
+def compare(results: list, baseline_file: str, tolerance: float) -> list:
+    with open(baseline_file, "r") as file: baseline = { result["operation"]: result for result in json.load(file) }
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["operation"])
+        if not previous: continue
+        if result["p50_ms"] > previous["p50_ms"] * (1 + tolerance): regressions.append("{}: p50 {:.1f}ms vs {:.1f}ms".format(result["operation"], result["p50_ms"], previous["p50_ms"]))
+        if result["peak_memory_mb"] > previous["peak_memory_mb"] * (1 + tolerance) + 1: regressions.append("{}: peak memory {:.1f}MB vs {:.1f}MB".format(result["operation"], result["peak_memory_mb"], previous["peak_memory_mb"]))
+    return regressions
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description = "Benchmark pbirest against a local Power BI REST API stand-in")
+    parser.add_argument("--iterations", type = int, default = 20)
+    parser.add_argument("--only", nargs = "*", help = "operations to run")
+    parser.add_argument("--workspaces", type = int, default = 50)
+    parser.add_argument("--events", type = int, default = 20000, help = "audit events per day")
+    parser.add_argument("--page-size", type = int, default = 1000)
+    parser.add_argument("--export-size", type = int, default = 20 * 1048576)
+    parser.add_argument("--latency", type = float, default = 0.002, help = "seconds added to every response")
+    parser.add_argument("--throttle-rate", type = float, default = 0.0, help = "share of requests answered with 429")
+    parser.add_argument("--json", help = "write the results to this file")
+    parser.add_argument("--compare", help = "baseline results file to compare with")
+    parser.add_argument("--tolerance", type = float, default = 0.25)
+    args = parser.parse_args()
+
+    config = StandInConfig(workspaces = args.workspaces, events_per_day = args.events, page_size = args.page_size, export_size = args.export_size, latency = args.latency, throttle_rate = args.throttle_rate, retry_after = 0.01)
+    metrics = pbirest.enable_metrics()
+    results = []
+
+    # The stand-in runs in its own process so that it does not compete with the client for the GIL
+    urls = multiprocessing.Queue()
+    process = multiprocessing.Process(target = serve, args = (config, urls), daemon = True)
+    process.start()
+    url = urls.get(timeout = 30)
+
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            pbirest.set_transport(pbirest.Transport(pool_maxsize = 32, api_url = "{}/v1.0/myorg".format(url), login_url = url))
+            pbirest.aio.set_max_concurrency(32)
+            pbirest.connect("client", "benchmark@contoso.com", "password")
+
+            for name, operation in operations(directory, args.export_size):
+                if args.only and name not in args.only: continue
+                results.append(measure(name, operation, args.iterations, metrics))
+    finally:
+        process.terminate()
+
+    columns = ["operation", "requests_per_second", "p50_ms", "p99_ms", "mb_per_second", "peak_memory_mb", "retries"]
+    print("{:<28} {:>12} {:>10} {:>10} {:>10} {:>10} {:>8}".format("operation", "requests/s", "p50 ms", "p99 ms", "MB/s", "peak MB", "retries"))
+    for result in results:
+        print("{:<28} {:>12.1f} {:>10.2f} {:>10.2f} {:>10.1f} {:>10.2f} {:>8}".format(*[result[column] for column in columns]))
+
+    if args.json:
+        with open(args.json, "w") as file: json.dump(results, file, indent = 1)
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        for regression in regressions: print("REGRESSION {}".format(regression))
+        if regressions: return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,19 @@
+from .core import Client
+from .core import get_default_client
+from .core import set_default_client
+from .core import enable_cache
+from .core import disable_cache
+
+from .cache import MetadataCache
+
 from .core import connect
 from .core import verify_token
 from .core import get_token
 
+from .auth import TokenManager
+
 from .core import get_workspace
+from .core import get_workspace_by_name
 from .core import get_workspaces
 from .core import create_workspace
 from .core import delete_workspace
@@ -12,15 +23,62 @@ from .core import delete_user_from_workspace
 from .core import update_user_in_workspace
 
 from .core import get_report
+from .core import get_report_by_name
 from .core import get_reports
 from .core import delete_report
 from .core import export_report
 from .core import import_report
 from .core import clone_report
+from .core import get_import
+
+from .imports import wait_for_import
+from .imports import wait_for_imports
+
+from .deploy import deploy_pbix
+from .deploy import deploy_clone
+from .deploy import failed_targets
+
+from .refresh import refresh_datasets
 
 from .core import get_dataset
+from .core import get_dataset_by_name
 from .core import get_datasets
 from .core import delete_dataset
 from .core import refresh_dataset
+from .core import get_refresh_history
+
+from .core import get_audit_logs
+from .core import iter_audit_logs
+from .core import export_audit_logs
+from .core import AuditLogError
+
+from .audit import split_windows
+from .audit import fetch_audit_log_windows
+from .audit import backfill_audit_logs
+
+from .sync import AuditLogStore
+from .sync import sync_audit_logs
+
+from .columnar import AuditEventTable
+
+from .inventory import crawl_inventory
+from .inventory import diff_inventory
+from .inventory import snapshot_inventory
+
+from .backup import backup_workspaces
+from .backup import restore_path
+
+from .transport import Transport
+from .transport import get_transport
+from .transport import set_transport
+from .transport import configure_transport
+
+from .ratelimit import RateLimiter
+from .ratelimit import TokenBucket
+
+from .metrics import Metrics
+from .metrics import enable_metrics
+from .metrics import disable_metrics
+from .metrics import get_metrics
 
-from .core import get_audit_logs
\ No newline at end of file
+from . import aio
@@ -0,0 +1,268 @@
+import asyncio
+import concurrent.futures
+import functools
+import threading
+import time
+import weakref
+
+from . import core
+from . import imports
+from .core import log
+from .transport import DEFAULT_POOL_MAXSIZE
+
+# The blocking functions of pbirest.core run on a shared thread pool and share the pooled
+# transport, so one event loop can keep up to max_concurrency requests in flight.
+_config = { "max_concurrency": DEFAULT_POOL_MAXSIZE }
+_executor = None
+_semaphores = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+def set_max_concurrency(max_concurrency: int) -> None:
+    global _executor
+    if max_concurrency < 1: raise ValueError("max_concurrency must be at least 1")
+
+    with _lock:
+        previous = _executor
+        _config["max_concurrency"] = max_concurrency
+        _executor = None
+        _semaphores.clear()
+    if previous is not None: previous.shutdown(wait = False)
+
+def get_max_concurrency() -> int:
+    return _config["max_concurrency"]
+
+def _get_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(max_workers = _config["max_concurrency"], thread_name_prefix = "pbirest")
+        return _executor
+
+def _get_semaphore() -> asyncio.Semaphore:
+    loop = asyncio.get_event_loop()
+    with _lock:
+        semaphore = _semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(_config["max_concurrency"])
+            _semaphores[loop] = semaphore
+        return semaphore
+
+async def _run(function, *args, **kwargs):
+    async with _get_semaphore():
+        return await asyncio.get_event_loop().run_in_executor(_get_executor(), functools.partial(function, *args, **kwargs))
+
+class AsyncClient:
+    def __init__(self, client: core.Client = None):
+        # Without a client of its own, calls go through the module-level functions of pbirest.core
+        self.client = client or core
+
+    async def connect(self, client_id: str, username: str, password: str, tenant_id: str = "common", client_secret: str = None, cache_file: str = None) -> None:
+        return await _run(self.client.connect, client_id, username, password, tenant_id, client_secret, cache_file)
+
+    async def verify_token(self) -> bool:
+        return await _run(self.client.verify_token)
+
+    async def get_token(self) -> dict:
+        return self.client.get_token()
+
+    # Workspace
+    async def get_workspaces(self) -> list:
+        return await _run(self.client.get_workspaces)
+
+    async def get_workspace(self, workspace_id: str) -> list:
+        return await _run(self.client.get_workspace, workspace_id)
+
+    async def get_workspace_by_name(self, workspace_name: str) -> dict:
+        return await _run(self.client.get_workspace_by_name, workspace_name)
+
+    async def create_workspace(self, workspace_name: str, new: bool = False) -> dict:
+        return await _run(self.client.create_workspace, workspace_name, new)
+
+    async def delete_workspace(self, workspace_id: str) -> dict:
+        return await _run(self.client.delete_workspace, workspace_id)
+
+    async def get_users_in_workspace(self, workspace_id: str) -> list:
+        return await _run(self.client.get_users_in_workspace, workspace_id)
+
+    async def add_user_to_workspace(self, workspace_id: str, email: str, access: str = "Member") -> dict:
+        return await _run(self.client.add_user_to_workspace, workspace_id, email, access)
+
+    async def delete_user_from_workspace(self, workspace_id: str, email: str) -> dict:
+        return await _run(self.client.delete_user_from_workspace, workspace_id, email)
+
+    async def update_user_in_workspace(self, workspace_id: str, email: str, access: str = "Member") -> dict:
+        return await _run(self.client.update_user_in_workspace, workspace_id, email, access)
+
+    # Report
+    async def get_reports(self, workspace_id: str) -> list:
+        return await _run(self.client.get_reports, workspace_id)
+
+    async def get_report(self, workspace_id: str, report_id: str) -> list:
+        return await _run(self.client.get_report, workspace_id, report_id)
+
+    async def get_report_by_name(self, workspace_id: str, report_name: str) -> dict:
+        return await _run(self.client.get_report_by_name, workspace_id, report_name)
+
+    async def delete_report(self, workspace_id: str, report_id: str) -> dict:
+        return await _run(self.client.delete_report, workspace_id, report_id)
+
+    async def export_report(self, workspace_id: str, report_id: str, out_file: str, chunk_size: int = 1048576, resume: bool = False, checksum: str = None, progress = None, retries: int = 3) -> dict:
+        return await _run(self.client.export_report, workspace_id, report_id, out_file, chunk_size, resume, checksum, progress, retries)
+
+    async def import_report(self, workspace_id: str, report_name: str, in_file: str, name_conflict: str = "CreateOrOverwrite", chunk_size: int = 1048576) -> dict:
+        return await _run(self.client.import_report, workspace_id, report_name, in_file, name_conflict, chunk_size)
+
+    async def get_import(self, workspace_id: str, import_id: str) -> dict:
+        return await _run(self.client.get_import, workspace_id, import_id)
+
+    async def wait_for_import(self, workspace_id: str, import_id: str, timeout: float = 3600, initial_delay: float = 1.0, max_delay: float = 30.0) -> dict:
+        # No thread is held between polls, so any number of imports can be awaited together
+        started = time.monotonic()
+        delay = initial_delay
+        while True:
+            status = await self.get_import(workspace_id, import_id)
+            if status is None or status.get("importState") in imports.IMPORT_STATES_DONE: return status
+            if time.monotonic() - started >= timeout:
+                log.warning("The import {} in the workspace {} is still {} after {}s".format(import_id, workspace_id, status.get("importState"), timeout))
+                return status
+
+            await asyncio.sleep(imports.jitter(delay))
+            delay = imports.next_poll_delay(delay, max_delay)
+
+    async def clone_report(self, workspace_id: str, report_id: str, dest_report_name: str, dest_workspace_id: str = None) -> dict:
+        return await _run(self.client.clone_report, workspace_id, report_id, dest_report_name, dest_workspace_id)
+
+    # Dataset
+    async def get_datasets(self, workspace_id: str) -> list:
+        return await _run(self.client.get_datasets, workspace_id)
+
+    async def get_dataset(self, workspace_id: str, dataset_id: str) -> list:
+        return await _run(self.client.get_dataset, workspace_id, dataset_id)
+
+    async def get_dataset_by_name(self, workspace_id: str, dataset_name: str) -> dict:
+        return await _run(self.client.get_dataset_by_name, workspace_id, dataset_name)
+
+    async def delete_dataset(self, workspace_id: str, dataset_id: str) -> dict:
+        return await _run(self.client.delete_dataset, workspace_id, dataset_id)
+
+    async def refresh_dataset(self, workspace_id: str, dataset_id: str, notify_option: str = "NoNotification") -> dict:
+        return await _run(self.client.refresh_dataset, workspace_id, dataset_id, notify_option)
+
+    async def get_refresh_history(self, workspace_id: str, dataset_id: str, top: int = None) -> list:
+        return await _run(self.client.get_refresh_history, workspace_id, dataset_id, top)
+
+    # Admin
+    async def get_audit_logs(self, start_date: str, end_date: str, activity: str = None, user_id: str = None) -> list:
+        return await _run(self.client.get_audit_logs, start_date, end_date, activity, user_id)
+
+    async def iter_audit_logs(self, start_date: str, end_date: str, activity: str = None, user_id: str = None, pages: bool = False):
+        page_iterator = await _run(self.client.iter_audit_logs, start_date, end_date, activity, user_id, True)
+        if page_iterator is None: return
+
+        done = object()
+        while True:
+            page = await _run(next, page_iterator, done)
+            if page is done: return
+
+            if pages: yield page
+            else:
+                for event in page: yield event
+
+    async def export_audit_logs(self, start_date: str, end_date: str, out_file: str, activity: str = None, user_id: str = None) -> dict:
+        return await _run(self.client.export_audit_logs, start_date, end_date, out_file, activity, user_id)
+
+default_client = AsyncClient()
+
+async def connect(client_id: str, username: str, password: str, tenant_id: str = "common", client_secret: str = None, cache_file: str = None) -> None:
+    return await default_client.connect(client_id, username, password, tenant_id, client_secret, cache_file)
+
+async def verify_token() -> bool:
+    return await default_client.verify_token()
+
+async def get_token() -> dict:
+    return await default_client.get_token()
+
+# Workspace
+async def get_workspaces() -> list:
+    return await default_client.get_workspaces()
+
+async def get_workspace(workspace_id: str) -> list:
+    return await default_client.get_workspace(workspace_id)
+
+async def get_workspace_by_name(workspace_name: str) -> dict:
+    return await default_client.get_workspace_by_name(workspace_name)
+
+async def create_workspace(workspace_name: str, new: bool = False) -> dict:
+    return await default_client.create_workspace(workspace_name, new)
+
+async def delete_workspace(workspace_id: str) -> dict:
+    return await default_client.delete_workspace(workspace_id)
+
+async def get_users_in_workspace(workspace_id: str) -> list:
+    return await default_client.get_users_in_workspace(workspace_id)
+
+async def add_user_to_workspace(workspace_id: str, email: str, access: str = "Member") -> dict:
+    return await default_client.add_user_to_workspace(workspace_id, email, access)
+
+async def delete_user_from_workspace(workspace_id: str, email: str) -> dict:
+    return await default_client.delete_user_from_workspace(workspace_id, email)
+
+async def update_user_in_workspace(workspace_id: str, email: str, access: str = "Member") -> dict:
+    return await default_client.update_user_in_workspace(workspace_id, email, access)
+
+# Report
+async def get_reports(workspace_id: str) -> list:
+    return await default_client.get_reports(workspace_id)
+
+async def get_report(workspace_id: str, report_id: str) -> list:
+    return await default_client.get_report(workspace_id, report_id)
+
+async def get_report_by_name(workspace_id: str, report_name: str) -> dict:
+    return await default_client.get_report_by_name(workspace_id, report_name)
+
+async def delete_report(workspace_id: str, report_id: str) -> dict:
+    return await default_client.delete_report(workspace_id, report_id)
+
+async def export_report(workspace_id: str, report_id: str, out_file: str, chunk_size: int = 1048576, resume: bool = False, checksum: str = None, progress = None, retries: int = 3) -> dict:
+    return await default_client.export_report(workspace_id, report_id, out_file, chunk_size, resume, checksum, progress, retries)
+
+async def import_report(workspace_id: str, report_name: str, in_file: str, name_conflict: str = "CreateOrOverwrite", chunk_size: int = 1048576) -> dict:
+    return await default_client.import_report(workspace_id, report_name, in_file, name_conflict, chunk_size)
+
+async def get_import(workspace_id: str, import_id: str) -> dict:
+    return await default_client.get_import(workspace_id, import_id)
+
+async def wait_for_import(workspace_id: str, import_id: str, timeout: float = 3600, initial_delay: float = 1.0, max_delay: float = 30.0) -> dict:
+    return await default_client.wait_for_import(workspace_id, import_id, timeout, initial_delay, max_delay)
+
+async def clone_report(workspace_id: str, report_id: str, dest_report_name: str, dest_workspace_id: str = None) -> dict:
+    return await default_client.clone_report(workspace_id, report_id, dest_report_name, dest_workspace_id)
+
+# Dataset
+async def get_datasets(workspace_id: str) -> list:
+    return await default_client.get_datasets(workspace_id)
+
+async def get_dataset(workspace_id: str, dataset_id: str) -> list:
+    return await default_client.get_dataset(workspace_id, dataset_id)
+
+async def get_dataset_by_name(workspace_id: str, dataset_name: str) -> dict:
+    return await default_client.get_dataset_by_name(workspace_id, dataset_name)
+
+async def delete_dataset(workspace_id: str, dataset_id: str) -> dict:
+    return await default_client.delete_dataset(workspace_id, dataset_id)
+
+async def refresh_dataset(workspace_id: str, dataset_id: str, notify_option: str = "NoNotification") -> dict:
+    return await default_client.refresh_dataset(workspace_id, dataset_id, notify_option)
+
+async def get_refresh_history(workspace_id: str, dataset_id: str, top: int = None) -> list:
+    return await default_client.get_refresh_history(workspace_id, dataset_id, top)
+
+# Admin
+async def get_audit_logs(start_date: str, end_date: str, activity: str = None, user_id: str = None) -> list:
+    return await default_client.get_audit_logs(start_date, end_date, activity, user_id)
+
+def iter_audit_logs(start_date: str, end_date: str, activity: str = None, user_id: str = None, pages: bool = False):
+    return default_client.iter_audit_logs(start_date, end_date, activity, user_id, pages)
+
+async def export_audit_logs(start_date: str, end_date: str, out_file: str, activity: str = None, user_id: str = None) -> dict:
+    return await default_client.export_audit_logs(start_date, end_date, out_file, activity, user_id)
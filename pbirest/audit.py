@@ -0,0 +1,83 @@
+import concurrent.futures
+import datetime
+import random
+import time
+
+import requests
+
+from . import core
+from .core import log
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def split_windows(start_date: str, end_date: str, window_hours: int = 24) -> list:
+    try:
+        start = datetime.datetime.strptime(start_date, DATE_FORMAT)
+        end = datetime.datetime.strptime(end_date, DATE_FORMAT)
+    except ValueError:
+        log.error("Error 400 -- Please, make sure the dates you gave match the following pattern: YYYY-MM-DD HH:MM:SS")
+        return None
+
+    if window_hours < 1 or window_hours > 24:
+        log.error("Error 400 -- Please, make sure the window_hours parameter is between 1 and 24")
+        return None
+
+    # The activity events endpoint needs both bounds of a window on the same UTC day
+    windows = []
+    step = datetime.timedelta(hours = window_hours)
+    second = datetime.timedelta(seconds = 1)
+    while start <= end:
+        next_day = datetime.datetime.combine(start.date() + datetime.timedelta(days = 1), datetime.time())
+        window_end = min(start + step, next_day, end + second) - second
+        windows.append((start.strftime(DATE_FORMAT), window_end.strftime(DATE_FORMAT)))
+        start = window_end + second
+
+    return windows
+
+def _fetch_window(window: tuple, activity: str, user_id: str, retries: int, backoff: float, client: core.Client) -> list:
+    attempt = 0
+    while True:
+        try:
+            pages = (client or core).iter_audit_logs(window[0], window[1], activity, user_id, pages = True)
+            if pages is None: return None
+
+            events = []
+            for page in pages: events += page
+            events.sort(key = lambda event: event.get("CreationTime", ""))
+            return events
+        except (core.AuditLogError, requests.RequestException, ValueError, KeyError) as error:
+            # Errors are kept to their window, so one bad window never discards the rest of the backfill
+            if attempt >= retries:
+                log.error("Error -- Giving up on audit logs from {} to {}: {}".format(window[0], window[1], error))
+                return None
+            delay = backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+            log.warning("Error -- Retrying audit logs from {} to {} in {:.1f}s: {}".format(window[0], window[1], delay, error))
+            time.sleep(delay)
+            attempt += 1
+
+def fetch_audit_log_windows(windows: list, activity: str = None, user_id: str = None, workers: int = 4, retries: int = 3, backoff: float = 1.0, client: core.Client = None) -> dict:
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+        futures = { executor.submit(_fetch_window, window, activity, user_id, retries, backoff, client): window for window in windows }
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as error:
+                window = futures[future]
+                log.error("Error -- Something went wrong when trying to retrieve audit logs from {} to {}: {}".format(window[0], window[1], error))
+                results[window] = None
+
+    # Windows never overlap, so concatenating them in window order keeps the events sorted by time
+    events = []
+    failed = []
+    for window in sorted(windows):
+        if results[window] is None: failed.append(window)
+        else: events += results[window]
+
+    if failed: log.error("Error -- {} of {} audit log windows could not be retrieved".format(len(failed), len(windows)))
+    return { "events": events, "failed": failed }
+
+def backfill_audit_logs(start_date: str, end_date: str, activity: str = None, user_id: str = None, window_hours: int = 24, workers: int = 4, retries: int = 3, backoff: float = 1.0, client: core.Client = None) -> dict:
+    windows = split_windows(start_date, end_date, window_hours)
+    if windows is None: return None
+    return fetch_audit_log_windows(windows, activity, user_id, workers, retries, backoff, client)
@@ -0,0 +1,172 @@
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from . import metrics
+from .transport import get_transport
+
+log = logging.getLogger("pbirest")
+
+HTTP_OK = 200
+
+class TokenManager:
+    def __init__(self, refresh_margin: float = 300, background: bool = True, transport = None):
+        self.token = { "bearer": None, "expiration": None }
+        self.credentials = { "client_id": None, "username": None, "password": None, "tenant_id": None, "client_secret": None }
+        self.refresh_margin = refresh_margin
+        self.background = background
+        self.transport = transport
+        self.cache_file = None
+        self.expires_at = None
+        self.lock = threading.Lock()
+        # Held while a background refresh runs; separate from the login lock so callers never wait on it
+        self.refreshing = threading.Lock()
+        self.refresh_failed_at = None
+        self.timer = None
+
+    def set_credentials(self, client_id: str, username: str, password: str, tenant_id: str, client_secret: str) -> None:
+        self.credentials["client_id"] = client_id
+        self.credentials["username"] = username
+        self.credentials["password"] = password
+        self.credentials["tenant_id"] = tenant_id
+        self.credentials["client_secret"] = client_secret
+
+    def set_token(self, bearer: str, expires_in: float = 3600) -> None:
+        if bearer is None:
+            self.token["bearer"] = None
+            self.token["expiration"] = None
+            self.expires_at = None
+            return
+
+        self.expires_at = time.time() + expires_in
+        self.token["bearer"] = "Bearer {}".format(bearer)
+        self.token["expiration"] = datetime.datetime.now() + datetime.timedelta(seconds = expires_in)
+        self._schedule_refresh()
+
+    def connect(self, client_id: str, username: str, password: str, tenant_id: str = "common", client_secret: str = None, cache_file: str = None) -> bool:
+        self.set_credentials(client_id, username, password, tenant_id, client_secret)
+        self.cache_file = cache_file
+
+        if self._read_cache():
+            log.info("Connected to the Power BI REST API with {} (cached token)".format(username))
+            return True
+
+        with self.lock:
+            if self._login():
+                log.info("Connected to the Power BI REST API with {}".format(username))
+                return True
+
+        self.set_credentials(None, None, None, None, None)
+        return False
+
+    def verify(self) -> bool:
+        if self.token["bearer"] is None:
+            log.error("Error 401 -- Please connect to the Power BI REST API with the connect() function before")
+            return False
+
+        expires_at = self.expires_at
+        # A failed login clears the token, possibly since the bearer check above
+        if expires_at is None: return self.refresh()
+
+        remaining = expires_at - time.time()
+        if remaining <= 0:
+            # The token is no longer usable: wait for the single refresh in flight, or run it
+            return self.refresh(expires_at)
+        if remaining <= self.refresh_margin: self._refresh_in_background(expires_at)
+        return True
+
+    def refresh(self, expired_at: float = None) -> bool:
+        with self.lock:
+            # Another thread refreshed the token while this one was waiting for the lock
+            if expired_at is not None and self.expires_at is not None and self.expires_at > expired_at and self.expires_at > time.time(): return True
+            return self._login()
+
+    def _refresh_in_background(self, expired_at: float = None) -> None:
+        # After a failed early refresh, the still valid token is used for a while before trying again
+        failed_at = self.refresh_failed_at
+        if failed_at is not None and time.time() - failed_at < min(self.refresh_margin / 4, 30): return
+        if not self.refreshing.acquire(blocking = False): return
+
+        if expired_at is None: expired_at = self.expires_at
+        def run() -> None:
+            refreshed = False
+            try:
+                refreshed = self.refresh(expired_at)
+            finally:
+                self.refresh_failed_at = None if refreshed else time.time()
+                self.refreshing.release()
+
+        threading.Thread(target = run, name = "pbirest-token", daemon = True).start()
+
+    def _schedule_refresh(self) -> None:
+        if self.timer is not None: self.timer.cancel()
+        if not self.background or self.credentials["client_id"] is None: return
+
+        delay = max(0, self.expires_at - time.time() - self.refresh_margin)
+        self.timer = threading.Timer(delay, self._refresh_in_background)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _login(self) -> bool:
+        body = {
+            "grant_type": "password",
+            "resource": "https://analysis.windows.net/powerbi/api",
+            "client_id": self.credentials["client_id"],
+            "username": self.credentials["username"],
+            "password": self.credentials["password"]
+        }
+        if self.credentials["client_secret"]: body["client_secret"] = self.credentials["client_secret"]
+
+        transport = self.transport or get_transport()
+        headers = { "Content-Type": "application/x-www-form-urlencoded" }
+        response = transport.request("POST", "{}/{}/oauth2/token".format(transport.login_url, self.credentials["tenant_id"]), headers = headers, data = body)
+
+        if metrics.active: metrics.active.record_token_refresh(response.status_code == HTTP_OK)
+
+        if response.status_code == HTTP_OK:
+            result = response.json()
+            self.set_token(result["access_token"], float(result.get("expires_in", 3600)))
+            self._write_cache(result["access_token"])
+            return True
+        else:
+            # A failed early refresh keeps the current token until it actually expires
+            if self.expires_at is None or self.expires_at <= time.time(): self.set_token(None)
+            log.error("Error {} -- Something went wrong when trying to retrieve the token from the REST API".format(response.status_code))
+            return False
+
+    def _cache_key(self) -> str:
+        identity = "{}|{}|{}".format(self.credentials["client_id"], self.credentials["username"], self.credentials["tenant_id"])
+        return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+    def _read_cache(self) -> bool:
+        if not self.cache_file or not os.path.exists(self.cache_file): return False
+
+        try:
+            with open(self.cache_file, "r") as file: cache = json.load(file)
+        except (OSError, ValueError):
+            return False
+
+        entry = cache.get(self._cache_key())
+        if not entry or entry["expires_at"] - time.time() <= self.refresh_margin: return False
+
+        self.set_token(entry["access_token"], entry["expires_at"] - time.time())
+        return True
+
+    def _write_cache(self, access_token: str) -> None:
+        if not self.cache_file: return
+
+        try:
+            with open(self.cache_file, "r") as file: cache = json.load(file)
+        except (OSError, ValueError):
+            cache = {}
+
+        # The cache only ever holds tokens, never passwords, and is readable by its owner only
+        cache[self._cache_key()] = { "access_token": access_token, "expires_at": self.expires_at }
+        temp_file = "{}.{}.tmp".format(self.cache_file, os.getpid())
+        descriptor = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(descriptor, "w") as file: json.dump(cache, file)
+        os.replace(temp_file, self.cache_file)
@@ -0,0 +1,149 @@
+import concurrent.futures
+import datetime
+import json
+import os
+import shutil
+import time
+import uuid
+
+from . import core
+from .core import log
+
+MANIFEST_VERSION = 1
+MODIFIED_FIELDS = ["modifiedDateTime", "lastUpdatedDateTime", "modifiedDate"]
+
+def _modified(report: dict) -> str:
+    # The report listing does not always carry a modification date; without one the report is always exported
+    for field in MODIFIED_FIELDS:
+        if report.get(field): return report[field]
+    return None
+
+def object_path(directory: str, digest: str) -> str:
+    return os.path.join(directory, "objects", digest[:2], "{}.pbix".format(digest))
+
+def load_manifest(directory: str) -> dict:
+    path = os.path.join(directory, "manifest.json")
+    if not os.path.exists(path): return None
+    with open(path, "r", encoding = "utf-8") as file: manifest = json.load(file)
+    if manifest.get("version") != MANIFEST_VERSION: return None
+    return manifest
+
+def _entry(workspace_id: str, report: dict) -> dict:
+    return { "workspace_id": workspace_id, "report_id": report["id"], "name": report.get("name"), "modified": _modified(report), "sha256": None, "bytes": 0, "transferred": 0, "seconds": 0.0, "status": None }
+
+def _backup_report(directory: str, workspace_id: str, report: dict, previous: dict, api) -> dict:
+    entry = _entry(workspace_id, report)
+
+    if previous and entry["modified"] and previous.get("modified") == entry["modified"] and previous.get("sha256") and os.path.exists(object_path(directory, previous["sha256"])):
+        entry.update(sha256 = previous["sha256"], bytes = previous["bytes"], status = "unchanged")
+        return entry
+
+    started = time.monotonic()
+    temp_file = os.path.join(directory, "tmp", "{}-{}.pbix".format(report["id"], uuid.uuid4().hex))
+    try:
+        result = api.export_report(workspace_id, report["id"], temp_file, checksum = "sha256")
+    except Exception as error:
+        log.error("Error -- Something went wrong when trying to export the report {} of the workspace {}: {}".format(report["id"], workspace_id, error))
+        result = None
+    entry["seconds"] = time.monotonic() - started
+
+    if result is None:
+        if os.path.exists(temp_file + ".part"): os.remove(temp_file + ".part")
+        return _failed_entry(entry, previous)
+
+    entry["sha256"] = result["sha256"]
+    entry["bytes"] = result["bytes"]
+    entry["transferred"] = result["bytes"]
+    target = object_path(directory, result["sha256"])
+
+    # Identical PBIX files are stored once, whatever the workspace or report they come from
+    if os.path.exists(target):
+        os.remove(temp_file)
+        entry["status"] = "deduplicated" if not previous or previous.get("sha256") != result["sha256"] else "unchanged"
+    else:
+        os.makedirs(os.path.dirname(target), exist_ok = True)
+        os.replace(temp_file, target)
+        entry["status"] = "exported"
+
+    return entry
+
+def _failed_entry(entry: dict, previous: dict) -> dict:
+    # The last good copy stays restorable; its modification date is kept so the next run tries again
+    if previous and previous.get("sha256"): entry.update(modified = previous.get("modified"), sha256 = previous["sha256"], bytes = previous["bytes"])
+    entry["status"] = "failed"
+    return entry
+
+def backup_workspaces(directory: str, workspace_ids: list = None, workers: int = 8, client: core.Client = None) -> dict:
+    api = client or core
+    if workspace_ids is None:
+        workspaces = api.get_workspaces()
+        if workspaces is None: return None
+        workspace_ids = [workspace["id"] for workspace in workspaces]
+
+    os.makedirs(os.path.join(directory, "tmp"), exist_ok = True)
+    os.makedirs(os.path.join(directory, "manifests"), exist_ok = True)
+    manifest = load_manifest(directory)
+    previous = { (entry["workspace_id"], entry["report_id"]): entry for entry in (manifest or {}).get("reports", []) }
+
+    started = time.monotonic()
+    created = datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    entries = []
+    errors = []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+        listings = { executor.submit(api.get_reports, workspace_id): workspace_id for workspace_id in workspace_ids }
+        exports = {}
+        for future in concurrent.futures.as_completed(listings):
+            workspace_id = listings[future]
+            try:
+                reports = future.result()
+            except Exception as error:
+                log.error("Error -- Something went wrong when trying to retrieve the reports of the workspace {}: {}".format(workspace_id, error))
+                reports = None
+
+            if reports is None:
+                # The reports of a workspace that could not be listed keep their previous backups
+                errors.append({ "workspace_id": workspace_id })
+                entries += [dict(entry, transferred = 0, seconds = 0.0, status = "kept") for key, entry in previous.items() if key[0] == workspace_id]
+                continue
+            for report in reports:
+                key = (workspace_id, report["id"])
+                exports[executor.submit(_backup_report, directory, workspace_id, report, previous.get(key), api)] = (workspace_id, report)
+
+        for future in concurrent.futures.as_completed(exports):
+            try:
+                entries.append(future.result())
+            except Exception as error:
+                workspace_id, report = exports[future]
+                log.error("Error -- Something went wrong when trying to back up the report {} of the workspace {}: {}".format(report["id"], workspace_id, error))
+                entries.append(_failed_entry(_entry(workspace_id, report), previous.get((workspace_id, report["id"]))))
+
+    entries.sort(key = lambda entry: (entry["workspace_id"], entry["report_id"]))
+    totals = {}
+    for entry in entries: totals[entry["status"]] = totals.get(entry["status"], 0) + 1
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "created": created,
+        "seconds": time.monotonic() - started,
+        "bytes_transferred": sum(entry["transferred"] for entry in entries),
+        "totals": totals,
+        "errors": errors,
+        "reports": entries
+    }
+
+    stamp = created.replace("-", "").replace(":", "")
+    manifest_path = os.path.join(directory, "manifests", "manifest-{}.json".format(stamp))
+    with open(manifest_path, "w", encoding = "utf-8") as file: json.dump(manifest, file, indent = 1)
+    shutil.copyfile(manifest_path, os.path.join(directory, "manifest.json.tmp"))
+    os.replace(os.path.join(directory, "manifest.json.tmp"), os.path.join(directory, "manifest.json"))
+
+    if totals.get("failed") or errors: log.error("Error -- {} reports and {} workspaces could not be backed up".format(totals.get("failed", 0), len(errors)))
+    log.info("Backed up {} reports in {:.1f}s ({} bytes transferred)".format(len(entries), manifest["seconds"], manifest["bytes_transferred"]))
+    return manifest
+
+def restore_path(directory: str, workspace_id: str, report_id: str) -> str:
+    manifest = load_manifest(directory)
+    for entry in (manifest or {}).get("reports", []):
+        if entry["workspace_id"] == workspace_id and entry["report_id"] == report_id and entry["sha256"]: return object_path(directory, entry["sha256"])
+    return None
@@ -0,0 +1,74 @@
+import collections
+import threading
+import time
+
+DEFAULT_TTL = { "workspaces": 300, "workspace": 300, "reports": 300, "report": 300, "datasets": 300, "dataset": 300, "users": 60 }
+
+class _Listing:
+    def __init__(self, items: list):
+        # A copy of its own, so callers changing the list they were given never change the cache
+        self.items = list(items)
+        self.by_id = { item["id"]: item for item in items if "id" in item }
+        self.by_name = {}
+        for item in items:
+            # Names are not unique: the index keeps the first item of each name, like a linear scan would
+            if "name" in item and item["name"] not in self.by_name: self.by_name[item["name"]] = item
+
+class MetadataCache:
+    def __init__(self, ttl: dict = None, max_entries: int = 1024):
+        self.ttl = dict(DEFAULT_TTL, **(ttl or {}))
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, key: tuple):
+        # Called with the lock held: returns the live value and marks it as recently used
+        entry = self.entries.get(key)
+        if entry is None: return None
+        if entry[0] < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def get(self, key: tuple):
+        with self.lock:
+            value = self._entry(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if isinstance(value, _Listing): return list(value.items)
+            return value
+
+    def find(self, key: tuple, field: str, value: str) -> dict:
+        with self.lock:
+            listing = self._entry(key)
+            if not isinstance(listing, _Listing):
+                self.misses += 1
+                return None
+            item = (listing.by_id if field == "id" else listing.by_name).get(value)
+            if item is None: self.misses += 1
+            else: self.hits += 1
+            return item
+
+    def set(self, key: tuple, value):
+        if value is None: return value
+        with self.lock:
+            stored = _Listing(value) if isinstance(value, list) else value
+            self.entries[key] = (time.monotonic() + self.ttl.get(key[0], 300), stored)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries: self.entries.popitem(last = False)
+        if isinstance(stored, _Listing): return list(stored.items)
+        return value
+
+    def invalidate(self, *prefixes) -> None:
+        with self.lock:
+            for key in [key for key in self.entries if any(key[:len(prefix)] == prefix for prefix in prefixes)]:
+                del self.entries[key]
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
@@ -0,0 +1,120 @@
+import array
+import calendar
+import collections
+import datetime
+import sys
+import time
+
+DEFAULT_COLUMNS = ("Activity", "Operation", "Workload", "UserId", "WorkspaceId", "ReportId", "DatasetId", "ItemName")
+
+class _Dictionary:
+    # Code 0 is kept for missing values
+    def __init__(self):
+        self.values = [None]
+        self.codes = { None: 0 }
+
+    def encode(self, value) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(sys.intern(value) if isinstance(value, str) else value)
+        return code
+
+    def memory_usage(self) -> int:
+        return sys.getsizeof(self.values) + sys.getsizeof(self.codes) + sum(sys.getsizeof(value) for value in self.values)
+
+def _parse_timestamp(value: str) -> int:
+    if not value: return 0
+    return calendar.timegm(time.strptime(value[:19], "%Y-%m-%dT%H:%M:%S"))
+
+def _deep_sizeof(value) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict): size += sum(_deep_sizeof(key) + _deep_sizeof(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple)): size += sum(_deep_sizeof(item) for item in value)
+    return size
+
+class AuditEventTable:
+    def __init__(self, columns: tuple = DEFAULT_COLUMNS, measure_source: bool = False):
+        self.columns = tuple(columns)
+        self.timestamps = array.array("q")
+        self.codes = { column: array.array("I") for column in self.columns }
+        self.dictionaries = { column: _Dictionary() for column in self.columns }
+        self.source_bytes = 0 if measure_source else None
+
+    @classmethod
+    def from_pages(cls, pages, columns: tuple = DEFAULT_COLUMNS, measure_source: bool = False) -> "AuditEventTable":
+        table = cls(columns, measure_source)
+        for page in pages: table.extend(page)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def append(self, event: dict) -> None:
+        self.timestamps.append(_parse_timestamp(event.get("CreationTime")))
+        for column in self.columns:
+            self.codes[column].append(self.dictionaries[column].encode(event.get(column)))
+        if self.source_bytes is not None: self.source_bytes += _deep_sizeof(event) + 8
+
+    def extend(self, events: list) -> None:
+        for event in events: self.append(event)
+
+    def column(self, name: str) -> list:
+        if name == "CreationTime":
+            return [datetime.datetime.utcfromtimestamp(value) for value in self.timestamps]
+        values = self.dictionaries[name].values
+        return [values[code] for code in self.codes[name]]
+
+    def row(self, index: int) -> dict:
+        event = { "CreationTime": datetime.datetime.utcfromtimestamp(self.timestamps[index]).strftime("%Y-%m-%dT%H:%M:%S") }
+        for column in self.columns:
+            event[column] = self.dictionaries[column].values[self.codes[column][index]]
+        return event
+
+    def _take(self, indices) -> "AuditEventTable":
+        # The filtered table shares the dictionaries, only the code arrays are copied
+        table = AuditEventTable.__new__(AuditEventTable)
+        table.columns = self.columns
+        table.dictionaries = self.dictionaries
+        table.source_bytes = None
+        table.timestamps = array.array("q", [self.timestamps[index] for index in indices])
+        table.codes = { column: array.array("I", [self.codes[column][index] for index in indices]) for column in self.columns }
+        return table
+
+    def filter(self, start_date: str = None, end_date: str = None, **conditions) -> "AuditEventTable":
+        mask = [True] * len(self)
+
+        if start_date or end_date:
+            start = _parse_timestamp(start_date.replace(" ", "T")) if start_date else None
+            end = _parse_timestamp(end_date.replace(" ", "T")) if end_date else None
+            for index, value in enumerate(self.timestamps):
+                if (start is not None and value < start) or (end is not None and value > end): mask[index] = False
+
+        for column, wanted in conditions.items():
+            if isinstance(wanted, (str, type(None))): wanted = [wanted]
+            # Compare integer codes rather than strings; values never seen cannot match
+            codes = { self.dictionaries[column].codes[value] for value in wanted if value in self.dictionaries[column].codes }
+            for index, code in enumerate(self.codes[column]):
+                if code not in codes: mask[index] = False
+
+        return self._take([index for index, keep in enumerate(mask) if keep])
+
+    def count_by(self, *columns, by_day: bool = False) -> dict:
+        keys = [self.codes[column] for column in columns]
+        if by_day: keys.append(array.array("q", (value // 86400 for value in self.timestamps)))
+
+        counts = collections.Counter(zip(*keys))
+        dictionaries = [self.dictionaries[column].values for column in columns]
+        result = {}
+        for key, count in counts.items():
+            decoded = tuple(values[code] for values, code in zip(dictionaries, key))
+            if by_day: decoded += (datetime.date.fromordinal(datetime.date(1970, 1, 1).toordinal() + key[-1]).isoformat(),)
+            result[decoded] = count
+        return result
+
+    def memory_usage(self) -> dict:
+        columnar = sys.getsizeof(self.timestamps)
+        columnar += sum(sys.getsizeof(codes) for codes in self.codes.values())
+        columnar += sum(dictionary.memory_usage() for dictionary in self.dictionaries.values())
+        return { "columnar": columnar, "source": self.source_bytes, "events": len(self) }
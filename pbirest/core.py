@@ -1,401 +1,726 @@
-import requests
 import datetime
+import hashlib
+import json
 import logging
+import os
 import re
+import requests
+import threading
+from urllib.parse import quote
 
-token = { "bearer": None, "expiration": None }
-credentials = { "client_id": None, "username": None, "password": None, "tenant_id": None, "client_secret": None }
+from . import metrics
+from .auth import TokenManager
+from .cache import MetadataCache
+from .ratelimit import RateLimiter
+from .transport import MultipartFile, Transport, get_transport
 
-log = logging.getLogger()
-console = logging.StreamHandler()
-console.setFormatter(logging.Formatter("%(asctime)s\t%(levelname)s -- %(message)s"))
-log.addHandler(console)
-log.setLevel(20)
+# The library logs to its own logger and leaves handlers and levels to the application
+log = logging.getLogger("pbirest")
+log.addHandler(logging.NullHandler())
 
 HTTP_OK = 200
 HTTP_ACCEPTED = 202
+HTTP_PARTIAL_CONTENT = 206
+HTTP_REQUESTED_RANGE_NOT_SATISFIABLE = 416
 
-def connect(client_id: str, username: str, password: str, tenant_id: str = "common", client_secret: str = None) -> None:
-    global token
-    global credentials
+class AuditLogError(Exception):
+    def __init__(self, status_code: int, message: str):
+        super().__init__("Error {} -- {}".format(status_code, message))
+        self.status_code = status_code
+
+def _audit_logs_url(start_date: str, end_date: str, activity: str = None, user_id: str = None) -> str:
+    date_regex = r"^\d\d\d\d-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01]) ([01][0-9]|2[0-3]):([0-5][0-9]):([0-5][0-9])$"
+    start_date_verification = re.search(date_regex, start_date)
+    end_date_verification = re.search(date_regex, end_date)
 
-    if client_secret:
-        body = {
-            "grant_type": "password",
-            "resource": "https://analysis.windows.net/powerbi/api",
-            "client_id": client_id,
-            "client_secret": client_secret,
-            "username": username,
-            "password": password
-        }
-    else:
-        body = {
-            "grant_type": "password",
-            "resource": "https://analysis.windows.net/powerbi/api",
-            "client_id": client_id,
-            "username": username,
-            "password": password
-        }
-
-    headers = { "Content-Type": "application/x-www-form-urlencoded" }
-    response = requests.post("https://login.microsoftonline.com/{}/oauth2/token".format(tenant_id), headers = headers, data = body)
-
-    if response.status_code == HTTP_OK:
-        set_credentials(client_id, username, password, tenant_id, client_secret)
-        set_token(response.json()["access_token"])
-        log.info("Connected to the Power BI REST API with {}".format(username))
-    else:
-        set_credentials(None, None, None, None, None)
-        set_token(None)
-        log.error("Error {} -- Something went wrong when trying to retrieve the token from the REST API".format(response.status_code))
+    if(not start_date_verification or not end_date_verification): return None
+
+    start_date_value = datetime.datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    end_date_value = datetime.datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    params = ""
+
+    if activity:
+        params += "Activity eq '{}'".format(activity)
+    if user_id:
+        if params != "": params += " and "
+        params += "UserId eq '{}'".format(user_id)
+
+    if params == "": return "admin/activityevents?startDateTime='{}'&endDateTime='{}'".format(start_date_value, end_date_value)
+    else: return "admin/activityevents?startDateTime='{}'&endDateTime='{}'&$filter={}".format(start_date_value, end_date_value, params)
+
+def _iter_audit_log_events(pages):
+    for page in pages:
+        for event in page: yield event
+
+class Client:
+    def __init__(self, transport: Transport = None, refresh_margin: float = 300, background: bool = True, cache: MetadataCache = None, rate_limiter: RateLimiter = None):
+        # Without a transport of its own, the client shares the default connection pool
+        self.transport = transport
+        # Throttling is per tenant, so without a rate limiter of its own the client copies the
+        # limits of its transport into buckets that a 429 for another client never pauses
+        self.rate_limiter = rate_limiter
+        self.shared_rate_limiter = None
+        self.own_rate_limiter = None
+        self.rate_limiter_lock = threading.Lock()
+        self.token_manager = TokenManager(refresh_margin, background, transport)
+        self.token = self.token_manager.token
+        self.credentials = self.token_manager.credentials
+        self.cache = cache
+
+    def request(self, method: str, path: str, **kwargs) -> requests.Response:
+        transport = self.transport or get_transport()
+        return transport.request(method, path, rate_limiter = self.get_rate_limiter(transport), **kwargs)
+
+    def get_rate_limiter(self, transport: Transport = None) -> RateLimiter:
+        if self.rate_limiter is not None: return self.rate_limiter
+        shared = (transport or self.transport or get_transport()).rate_limiter
+        with self.rate_limiter_lock:
+            # Rebuilt when the transport or its rate limiter is replaced with configure_transport
+            if self.shared_rate_limiter is not shared or self.own_rate_limiter is None:
+                self.own_rate_limiter = shared.copy()
+                self.shared_rate_limiter = shared
+            return self.own_rate_limiter
+
+    # Cache
+    def enable_cache(self, ttl: dict = None, max_entries: int = 1024) -> MetadataCache:
+        self.cache = MetadataCache(ttl, max_entries)
+        return self.cache
+
+    def disable_cache(self) -> None:
+        self.cache = None
+
+    def _cache_get(self, key: tuple):
+        if self.cache is None: return None
+        return self.cache.get(key)
+
+    def _cache_find(self, key: tuple, field: str, value: str) -> dict:
+        if self.cache is None: return None
+        return self.cache.find(key, field, value)
+
+    def _cache_set(self, key: tuple, value):
+        if self.cache is None: return value
+        return self.cache.set(key, value)
+
+    def _cache_invalidate(self, *prefixes) -> None:
+        if self.cache is not None: self.cache.invalidate(*prefixes)
+
+    def connect(self, client_id: str, username: str, password: str, tenant_id: str = "common", client_secret: str = None, cache_file: str = None) -> None:
+        self.token_manager.connect(client_id, username, password, tenant_id, client_secret, cache_file)
+
+    def verify_token(self) -> bool:
+        return self.token_manager.verify()
+
+    def get_token(self) -> dict:
+        return self.token
+
+    def set_token(self, bearer: str, expires_in: float = 3600) -> None:
+        self.token_manager.set_token(bearer, expires_in)
+
+    def set_credentials(self, client_id: str, username: str, password: str, tenant_id: str, client_secret: str) -> None:
+        self.token_manager.set_credentials(client_id, username, password, tenant_id, client_secret)
+
+    # Workspace
+    def get_workspaces(self) -> list:
+        cached = self._cache_get(("workspaces",))
+        if cached is not None: return cached
+        if(not self.verify_token()): return None
+
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("GET", "groups", headers = headers)
 
-def verify_token() -> bool:
-    global token
-    if token["bearer"] == None:
-        log.error("Error 401 -- Please connect to the Power BI REST API with the connect() function before")
-        return False
-    else:
-        if token["expiration"] < datetime.datetime.now():
-            connect(credentials["client_id"], credentials["username"], credentials["password"], credentials["tenant_id"], credentials["client_secret"])
-            return True
+        if response.status_code == HTTP_OK:
+            return self._cache_set(("workspaces",), response.json()["value"])
         else:
-            return True
+            log.error("Error {} -- Something went wrong when trying to retrieve the list of workspaces you have access".format(response.status_code))
+            return None
 
-def get_token() -> dict:
-    global token
-    return token
+    def get_workspace(self, workspace_id: str) -> list:
+        cached = self._cache_find(("workspaces",), "id", workspace_id) or self._cache_get(("workspace", workspace_id))
+        if cached is not None: return cached
+        if(not self.verify_token()): return None
 
-def set_token(bearer: str) -> None:
-    global token
-    token["bearer"] = "Bearer {}".format(bearer)
-    token["expiration"] = datetime.datetime.now() + datetime.timedelta(hours = 1)
+        # Let the service filter the list instead of downloading every workspace
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("GET", "groups?$filter=id eq '{}'".format(workspace_id), headers = headers)
 
-def set_credentials(client_id: str, username: str, password: str, tenant_id: str, client_secret: str) -> None:
-    global credentials
-    credentials["client_id"] = client_id
-    credentials["username"] = username
-    credentials["password"] = password
-    credentials["tenant_id"] = tenant_id
-    credentials["client_secret"] = client_secret
+        if response.status_code == HTTP_OK:
+            ws = [result for result in response.json()["value"] if result["id"] == workspace_id]
+            if(len(ws) > 0): return self._cache_set(("workspace", workspace_id), ws[0])
+            else: return None
+        else:
+            log.error("Error {} -- Something went wrong when trying to retrieve the workspace {}".format(response.status_code, workspace_id))
+            return None
 
-# Workspace
-def get_workspaces() -> list:
-    global token
-    if(not verify_token()): return None
+    def get_workspace_by_name(self, workspace_name: str) -> dict:
+        cached = self._cache_find(("workspaces",), "name", workspace_name)
+        if cached is not None: return cached
+        if(not self.verify_token()): return None
+
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("GET", "groups?$filter=name eq '{}'&$top=1".format(quote(workspace_name.replace("'", "''"))), headers = headers)
 
-    headers = { "Authorization": token["bearer"] }
-    response = requests.get("https://api.powerbi.com/v1.0/myorg/groups", headers = headers)
+        if response.status_code == HTTP_OK:
+            ws = response.json()["value"]
+            if(len(ws) > 0): return self._cache_set(("workspace", ws[0]["id"]), ws[0])
+            else: return None
+        else:
+            log.error("Error {} -- Something went wrong when trying to retrieve the workspace {}".format(response.status_code, workspace_name))
+            return None
 
-    if response.status_code == HTTP_OK:
-        return response.json()["value"]
-    else:
-        log.error("Error {} -- Something went wrong when trying to retrieve the list of workspaces you have access".format(response.status_code))
-        return None
+    def create_workspace(self, workspace_name: str, new: bool = False) -> dict:
+        if(not self.verify_token()): return None
 
-def get_workspace(workspace_id: str) -> list:
-    global token
-    if(not verify_token()): return None
+        headers = { "Authorization": self.token["bearer"] }
+        body = { "name": workspace_name }
 
-    headers = { "Authorization": token["bearer"] }
-    response = requests.get("https://api.powerbi.com/v1.0/myorg/groups", headers = headers)
+        if new:
+            response = self.request("POST", "groups?workspaceV2=True", headers = headers, data = body)
+            self._cache_invalidate(("workspaces",))
 
-    if response.status_code == HTTP_OK:
-        ws = [result for result in response.json()["value"] if result["id"] == workspace_id]
-        if(len(ws) > 0): return ws[0]
-        else: return None
-    else:
-        log.error("Error {} -- Something went wrong when trying to retrieve the workspace {}".format(response.status_code, workspace_id))
-        return None
+            if response.status_code == HTTP_OK:
+                result = response.json()
+                return { "id": result["id"], "isOnDedicatedCapacity": result["isOnDedicatedCapacity"], "name": result["name"] }
+            else:
+                log.error("Error {} -- Something went wrong when trying to create a new workspace V2 called {}".format(response.status_code, workspace_name))
+                return None
+        else:
+            response = self.request("POST", "groups", headers = headers, data = body)
+            self._cache_invalidate(("workspaces",))
 
-def create_workspace(workspace_name: str, new: bool = False) -> dict:
-    global token
-    if(not verify_token()): return None
+            if response.status_code == HTTP_OK:
+                result = response.json()
+                return { "id": result["id"], "isReadOnly": result["isReadOnly"], "isOnDedicatedCapacity": result["isOnDedicatedCapacity"], "name": result["name"] }
+            else:
+                log.error("Error {} -- Something went wrong when trying to create a new workspace called {}".format(response.status_code, workspace_name))
+                return None
 
-    headers = { "Authorization": token["bearer"] }
-    body = { "name": workspace_name }
+    def delete_workspace(self, workspace_id: str) -> dict:
+        if(not self.verify_token()): return None
 
-    if new:
-        response = requests.post("https://api.powerbi.com/v1.0/myorg/groups?workspaceV2=True", headers = headers, data = body)
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("DELETE", "groups/{}".format(workspace_id), headers = headers)
+        self._cache_invalidate(("workspaces",), ("workspace", workspace_id), ("users", workspace_id), ("reports", workspace_id), ("report", workspace_id), ("datasets", workspace_id), ("dataset", workspace_id))
 
         if response.status_code == HTTP_OK:
-            result = response.json()
-            return { "id": result["id"], "isOnDedicatedCapacity": result["isOnDedicatedCapacity"], "name": result["name"] }
+            return { "response": response.status_code }
         else:
-            log.error("Error {} -- Something went wrong when trying to create a new workspace V2 called {}".format(response.status_code, workspace_name))
+            log.error("Error {} -- Something went wrong when trying to delete the workspace {}".format(response.status_code, workspace_id))
             return None
-    else:
-        response = requests.post("https://api.powerbi.com/v1.0/myorg/groups", headers = headers, data = body)
+
+    def get_users_in_workspace(self, workspace_id: str) -> list:
+        cached = self._cache_get(("users", workspace_id))
+        if cached is not None: return cached
+        if(not self.verify_token()): return None
+
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("GET", "groups/{}/users".format(workspace_id), headers = headers)
 
         if response.status_code == HTTP_OK:
-            result = response.json()
-            return { "id": result["id"], "isReadOnly": result["isReadOnly"], "isOnDedicatedCapacity": result["isOnDedicatedCapacity"], "name": result["name"] }
+            return self._cache_set(("users", workspace_id), response.json()["value"])
         else:
-            log.error("Error {} -- Something went wrong when trying to create a new workspace called {}".format(response.status_code, workspace_name))
+            log.error("Error {} -- Something went wrong when trying to retrieve the list of users in the workspace {}".format(response.status_code, workspace_id))
             return None
 
-def delete_workspace(workspace_id: str) -> dict:
-    global token
-    if(not verify_token()): return None
+    def add_user_to_workspace(self, workspace_id: str, email: str, access: str = "Member") -> dict:
+        if(not self.verify_token()): return None
 
-    headers = { "Authorization": token["bearer"] }
-    response = requests.delete("https://api.powerbi.com/v1.0/myorg/groups/{}".format(workspace_id), headers = headers)
+        if(access in ["Admin", "Contributor", "Member"]):
+            headers = { "Authorization": self.token["bearer"] }
+            body = { "userEmailAddress": email, "groupUserAccessRight": access }
+            response = self.request("POST", "groups/{}/users".format(workspace_id), headers = headers, data = body)
+            self._cache_invalidate(("users", workspace_id))
 
-    if response.status_code == HTTP_OK:
-        return { "response": response.status_code }
-    else:
-        log.error("Error {} -- Something went wrong when trying to delete the workspace {}".format(response.status_code, workspace_id))
-        return None
+            if response.status_code == HTTP_OK:
+                return { "response": response.status_code }
+            else:
+                log.error("Error {} -- Something went wrong when trying to add {} in the workspace {}".format(response.status_code, email, workspace_id))
+                return None
+        else:
+            log.error("Error 400 -- Please, make sure the access parameter is either \"Admin\", \"Contributor\" or \"Member\"")
+            return None
 
-def get_users_in_workspace(workspace_id: str) -> list:
-    global token
-    if(not verify_token()): return None
+    def delete_user_from_workspace(self, workspace_id: str, email: str) -> dict:
+        if(not self.verify_token()): return None
+
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("DELETE", "groups/{}/users/{}".format(workspace_id, email), headers = headers)
+        self._cache_invalidate(("users", workspace_id))
+
+        if response.status_code == HTTP_OK:
+            return { "response": response.status_code }
+        else:
+            log.error("Error {} -- Something went wrong when trying to delete the user {} from the workspace {}".format(response.status_code, email, workspace_id))
+            return None
 
-    headers = { "Authorization": token["bearer"] }
-    response = requests.get("https://api.powerbi.com/v1.0/myorg/groups/{}/users".format(workspace_id), headers = headers)
+    def update_user_in_workspace(self, workspace_id: str, email: str, access: str = "Member") -> dict:
+        if(not self.verify_token()): return None
 
-    if response.status_code == HTTP_OK:
-        return response.json()["value"]
-    else:
-        log.error("Error {} -- Something went wrong when trying to retrieve the list of users in the workspace {}".format(response.status_code, workspace_id))
-        return None
+        if(access in ["Admin", "Contributor", "Member"]):
+            headers = { "Authorization": self.token["bearer"] }
+            body = { "userEmailAddress": email, "groupUserAccessRight": access }
+            response = self.request("PUT", "groups/{}/users".format(workspace_id), headers = headers, data = body)
+            self._cache_invalidate(("users", workspace_id))
 
-def add_user_to_workspace(workspace_id: str, email: str, access: str = "Member") -> dict:
-    global token
-    if(not verify_token()): return None
-    
-    if(access in ["Admin", "Contributor", "Member"]):
-        headers = { "Authorization": token["bearer"] }
-        body = { "userEmailAddress": email, "groupUserAccessRight": access }
-        response = requests.post("https://api.powerbi.com/v1.0/myorg/groups/{}/users".format(workspace_id), headers = headers, data = body)
+            if response.status_code == HTTP_OK:
+                return { "response": response.status_code }
+            else:
+                log.error("Error {} -- Something went wrong when trying to update {} in the workspace {}".format(response.status_code, email, workspace_id))
+                return None
+        else:
+            log.error("Error 400 -- Please, make sure the access parameter is either \"Admin\", \"Contributor\" or \"Member\"")
+            return None
+
+    # Report
+    def get_reports(self, workspace_id: str) -> list:
+        cached = self._cache_get(("reports", workspace_id))
+        if cached is not None: return cached
+        if(not self.verify_token()): return None
+
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("GET", "groups/{}/reports".format(workspace_id), headers = headers)
 
         if response.status_code == HTTP_OK:
-            return { "response": response.status_code }
+            return self._cache_set(("reports", workspace_id), response.json()["value"])
         else:
-            log.error("Error {} -- Something went wrong when trying to add {} in the workspace {}".format(response.status_code, email, workspace_id))
+            log.error("Error {} -- Something went wrong when trying to retrieve the list of reports in the workspace {}".format(response.status_code, workspace_id))
             return None
-    else:
-        log.error("Error 400 -- Please, make sure the access parameter is either \"Admin\", \"Contributor\" or \"Member\"")
-        return None
 
-def delete_user_from_workspace(workspace_id: str, email: str) -> dict:
-    global token
-    if(not verify_token()): return None
+    def get_report(self, workspace_id: str, report_id: str) -> list:
+        cached = self._cache_find(("reports", workspace_id), "id", report_id) or self._cache_get(("report", workspace_id, report_id))
+        if cached is not None: return cached
+        if(not self.verify_token()): return None
 
-    headers = { "Authorization": token["bearer"] }
-    response = requests.delete("https://api.powerbi.com/v1.0/myorg/groups/{}/users/{}".format(workspace_id, email), headers = headers)
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("GET", "groups/{}/reports/{}".format(workspace_id, report_id), headers = headers)
 
-    if response.status_code == HTTP_OK:
-        return { "response": response.status_code }
-    else:
-        log.error("Error {} -- Something went wrong when trying to delete the user {} from the workspace {}".format(response.status_code, email, workspace_id))
-        return None
+        if response.status_code == HTTP_OK:
+            return self._cache_set(("report", workspace_id, report_id), response.json())
+        else:
+            log.error("Error {} -- Something went wrong when trying to retrieve the report {} in the workspace {}".format(response.status_code, report_id, workspace_id))
+            return None
 
-def update_user_in_workspace(workspace_id: str, email: str, access: str = "Member") -> dict:
-    global token
-    if(not verify_token()): return None
-    
-    if(access in ["Admin", "Contributor", "Member"]):
-        headers = { "Authorization": token["bearer"] }
-        body = { "userEmailAddress": email, "groupUserAccessRight": access }
-        response = requests.put("https://api.powerbi.com/v1.0/myorg/groups/{}/users".format(workspace_id), headers = headers, data = body)
+    def get_report_by_name(self, workspace_id: str, report_name: str) -> dict:
+        cached = self._cache_find(("reports", workspace_id), "name", report_name)
+        if cached is not None: return cached
+
+        reports = self.get_reports(workspace_id)
+        if reports is None: return None
+        return next((item for item in reports if item["name"] == report_name), None)
+
+    def delete_report(self, workspace_id: str, report_id: str) -> dict:
+        if(not self.verify_token()): return None
+
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("DELETE", "groups/{}/reports/{}".format(workspace_id, report_id), headers = headers)
+        self._cache_invalidate(("reports", workspace_id), ("report", workspace_id, report_id))
 
         if response.status_code == HTTP_OK:
             return { "response": response.status_code }
         else:
-            log.error("Error {} -- Something went wrong when trying to update {} in the workspace {}".format(response.status_code, email, workspace_id))
+            log.error("Error {} -- Something went wrong when trying to delete the report {} in the workspace {}".format(response.status_code, report_id, workspace_id))
             return None
-    else:
-        log.error("Error 400 -- Please, make sure the access parameter is either \"Admin\", \"Contributor\" or \"Member\"")
-        return None
 
-# Report
-def get_reports(workspace_id: str) -> list:
-    global token
-    if(not verify_token()): return None
+    def _open_export(self, path: str, headers: dict, offset: int, validator: str = None):
+        if offset > 0:
+            # With If-Range, a report that changed since the first bytes were written is sent whole again
+            range_headers = dict(headers, Range = "bytes={}-".format(offset))
+            if validator: range_headers["If-Range"] = validator
+            response = self.request("GET", path, headers = range_headers, stream = True)
+        else: response = self.request("GET", path, headers = headers, stream = True)
+
+        # A server that ignores the Range header sends the whole file again
+        if offset > 0 and response.status_code == HTTP_OK: offset = 0
+        if response.status_code == HTTP_REQUESTED_RANGE_NOT_SATISFIABLE:
+            response.close()
+            return self._open_export(path, headers, 0)
+
+        return response, offset
+
+    def export_report(self, workspace_id: str, report_id: str, out_file: str, chunk_size: int = 1048576, resume: bool = False, checksum: str = None, progress = None, retries: int = 3) -> dict:
+        if(not self.verify_token()): return None
+
+        path = "groups/{}/reports/{}/export".format(workspace_id, report_id)
+        part_file = out_file + ".part"
+        validator_file = out_file + ".part.validator"
+
+        # A download left by an earlier call is only resumed on request, and only with the ETag or
+        # Last-Modified value it was started with, so two versions of a report are never mixed
+        offset = 0
+        validator = None
+        if resume and os.path.exists(part_file) and os.path.exists(validator_file):
+            with open(validator_file, "r", encoding = "utf-8") as file: validator = file.read().strip() or None
+            if validator: offset = os.path.getsize(part_file)
+        attempt = 0
+
+        while True:
+            # A retry can come after the token was renewed, so the header is built for each attempt
+            if(not self.verify_token()): return None
+            headers = { "Authorization": self.token["bearer"] }
+            response, offset = self._open_export(path, headers, offset, validator)
+
+            if response.status_code not in [HTTP_OK, HTTP_PARTIAL_CONTENT]:
+                log.error("Error {} -- Something went wrong when trying to export the report {} in the workspace {}".format(response.status_code, report_id, workspace_id))
+                response.close()
+                return None
+
+            if response.status_code == HTTP_OK or validator is None:
+                validator = response.headers.get("ETag") or response.headers.get("Last-Modified")
+                if resume:
+                    if validator:
+                        with open(validator_file, "w", encoding = "utf-8") as file: file.write(validator)
+                    elif os.path.exists(validator_file): os.remove(validator_file)
+
+            length = response.headers.get("Content-Length")
+            total = offset + int(length) if length else None
+            digest = hashlib.new(checksum) if checksum else None
+
+            try:
+                with open(part_file, "ab" if offset > 0 else "wb") as file:
+                    if digest and offset > 0:
+                        # Hash what a previous attempt already wrote before appending to it
+                        with open(part_file, "rb") as previous:
+                            for chunk in iter(lambda: previous.read(chunk_size), b""): digest.update(chunk)
+
+                    for chunk in response.iter_content(chunk_size = chunk_size):
+                        file.write(chunk)
+                        if digest: digest.update(chunk)
+                        offset += len(chunk)
+                        if progress: progress(offset, total)
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError) as error:
+                response.close()
+                if attempt >= retries:
+                    log.error("Error -- The connection was lost when trying to export the report {} in the workspace {}: {}".format(report_id, workspace_id, error))
+                    return None
+                attempt += 1
+                log.warning("Resuming the export of the report {} at byte {}".format(report_id, offset))
+                if metrics.active: metrics.active.record_retry(path, type(error).__name__)
+                continue
+
+            response.close()
+            if total is not None and offset < total:
+                if attempt >= retries:
+                    log.error("Error -- The export of the report {} in the workspace {} stopped at {} of {} bytes".format(report_id, workspace_id, offset, total))
+                    return None
+                attempt += 1
+                continue
+
+            os.replace(part_file, out_file)
+            if os.path.exists(validator_file): os.remove(validator_file)
+            result = { "response": response.status_code, "bytes": offset }
+            if digest: result[checksum] = digest.hexdigest()
+            return result
+
+    def import_report(self, workspace_id: str, report_name: str, in_file: str, name_conflict: str = "CreateOrOverwrite", chunk_size: int = 1048576) -> dict:
+        if(not self.verify_token()): return None
+
+        if(name_conflict in ["CreateOrOverwrite", "GenerateUniqueName", "Ignore", "Overwrite"]):
+            with MultipartFile(in_file, chunk_size = chunk_size) as body:
+                headers = { "Authorization": self.token["bearer"], "Content-Type": body.content_type }
+                response = self.request("POST", "groups/{}/imports?datasetDisplayName={}&nameConflict={}".format(workspace_id, quote(report_name), name_conflict), headers = headers, data = body)
+                # Overwrite replaces existing reports and datasets, so their cached entries go too
+                self._cache_invalidate(("reports", workspace_id), ("report", workspace_id), ("datasets", workspace_id), ("dataset", workspace_id))
+
+            if response.status_code == HTTP_ACCEPTED:
+                return response.json()
+            else:
+                log.error("Error {} -- Something went wrong when trying to import the report {} in the workspace {}".format(response.status_code, in_file, workspace_id))
+                return None
+        else:
+            log.error("Error 400 -- Please, make sure the name_conflict parameter is either \"CreateOrOverwrite\", \"GenerateUniqueName\", \"Ignore\" or \"Overwrite\"")
+            return None
 
-    headers = { "Authorization": token["bearer"] }
-    response = requests.get("https://api.powerbi.com/v1.0/myorg/groups/{}/reports".format(workspace_id), headers = headers)
+    def get_import(self, workspace_id: str, import_id: str) -> dict:
+        if(not self.verify_token()): return None
 
-    if response.status_code == HTTP_OK:
-        return response.json()["value"]
-    else:
-        log.error("Error {} -- Something went wrong when trying to retrieve the list of reports in the workspace {}".format(response.status_code, workspace_id))
-        return None
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("GET", "groups/{}/imports/{}".format(workspace_id, import_id), headers = headers)
 
-def get_report(workspace_id: str, report_id: str) -> list:
-    global token
-    if(not verify_token()): return None
+        if response.status_code == HTTP_OK:
+            return response.json()
+        else:
+            log.error("Error {} -- Something went wrong when trying to retrieve the import {} in the workspace {}".format(response.status_code, import_id, workspace_id))
+            return None
 
-    headers = { "Authorization": token["bearer"] }
-    response = requests.get("https://api.powerbi.com/v1.0/myorg/groups/{}/reports/{}".format(workspace_id, report_id), headers = headers)
+    def clone_report(self, workspace_id: str, report_id: str, dest_report_name: str, dest_workspace_id: str = None) -> dict:
+        if(not self.verify_token()): return None
 
-    if response.status_code == HTTP_OK:
-        return response.json()
-    else:
-        log.error("Error {} -- Something went wrong when trying to retrieve the report {} in the workspace {}".format(response.status_code, report_id, workspace_id))
-        return None
+        headers = { "Authorization": self.token["bearer"] }
+        if dest_workspace_id: body = { "name": dest_report_name, "targetWorkspaceId": dest_workspace_id }
+        else: body = { "name": dest_report_name }
 
-def delete_report(workspace_id: str, report_id: str) -> dict:
-    global token
-    if(not verify_token()): return None
+        response = self.request("POST", "groups/{}/reports/{}/clone".format(workspace_id, report_id), headers = headers, data = body)
+        self._cache_invalidate(("reports", dest_workspace_id or workspace_id))
 
-    headers = { "Authorization": token["bearer"] }
-    response = requests.delete("https://api.powerbi.com/v1.0/myorg/groups/{}/reports/{}".format(workspace_id, report_id), headers = headers)
+        if response.status_code == HTTP_OK:
+            return { "response": response.status_code }
+        else:
+            log.error("Error {} -- Something went wrong when trying to clone the report {} in the workspace {}".format(response.status_code, report_id, workspace_id))
+            return None
 
-    if response.status_code == HTTP_OK:
-        return { "response": response.status_code }
-    else:
-        log.error("Error {} -- Something went wrong when trying to delete the report {} in the workspace {}".format(response.status_code, report_id, workspace_id))
-        return None
+    # Dataset
+    def get_datasets(self, workspace_id: str) -> list:
+        cached = self._cache_get(("datasets", workspace_id))
+        if cached is not None: return cached
+        if(not self.verify_token()): return None
 
-def export_report(workspace_id: str, report_id: str, out_file: str) -> dict:
-    global token
-    if(not verify_token()): return None
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("GET", "groups/{}/datasets".format(workspace_id), headers = headers)
 
-    headers = { "Authorization": token["bearer"] }
-    response = requests.get("https://api.powerbi.com/v1.0/myorg/groups/{}/reports/{}/export".format(workspace_id, report_id), headers = headers)
+        if response.status_code == HTTP_OK:
+            return self._cache_set(("datasets", workspace_id), response.json()["value"])
+        else:
+            log.error("Error {} -- Something went wrong when trying to retrieve the list of datasets in the workspace {}".format(response.status_code, workspace_id))
+            return None
 
-    if response.status_code == HTTP_OK:
-        with open(out_file, "wb") as file: file.write(response.content)
-        return { "response": response.status_code }
-    else:
-        log.error("Error {} -- Something went wrong when trying to export the report {} in the workspace {}".format(response.status_code, report_id, workspace_id))
-        return None
+    def get_dataset(self, workspace_id: str, dataset_id: str) -> list:
+        cached = self._cache_find(("datasets", workspace_id), "id", dataset_id) or self._cache_get(("dataset", workspace_id, dataset_id))
+        if cached is not None: return cached
+        if(not self.verify_token()): return None
 
-def import_report(workspace_id: str, report_name: str, in_file: str, name_conflict: str = "CreateOrOverwrite") -> dict:
-    global token
-    if(not verify_token()): return None
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("GET", "groups/{}/datasets/{}".format(workspace_id, dataset_id), headers = headers)
 
-    if(name_conflict in ["CreateOrOverwrite", "GenerateUniqueName", "Ignore", "Overwrite"]):
-        headers = { "Authorization": token["bearer"], "Content-Type": "multipart/form-data" }
-        file = { "file": open(in_file, "rb") }
-        response = requests.post("https://api.powerbi.com/v1.0/myorg/groups/{}/imports?datasetDisplayName={}&nameConflict={}".format(workspace_id, report_name, name_conflict), headers = headers, files = file)
+        if response.status_code == HTTP_OK:
+            return self._cache_set(("dataset", workspace_id, dataset_id), response.json())
+        else:
+            log.error("Error {} -- Something went wrong when trying to retrieve the dataset {} in the workspace {}".format(response.status_code, dataset_id, workspace_id))
+            return None
 
-        if response.status_code == HTTP_ACCEPTED:
-            return response.json()
+    def get_dataset_by_name(self, workspace_id: str, dataset_name: str) -> dict:
+        cached = self._cache_find(("datasets", workspace_id), "name", dataset_name)
+        if cached is not None: return cached
+
+        datasets = self.get_datasets(workspace_id)
+        if datasets is None: return None
+        return next((item for item in datasets if item["name"] == dataset_name), None)
+
+    def delete_dataset(self, workspace_id: str, dataset_id: str) -> dict:
+        if(not self.verify_token()): return None
+
+        headers = { "Authorization": self.token["bearer"] }
+        response = self.request("DELETE", "groups/{}/datasets/{}".format(workspace_id, dataset_id), headers = headers)
+        self._cache_invalidate(("datasets", workspace_id), ("dataset", workspace_id, dataset_id))
+
+        if response.status_code == HTTP_OK:
+            return { "response": response.status_code }
         else:
-            log.error("Error {} -- Something went wrong when trying to import the report {} in the workspace {}".format(response.status_code, in_file, workspace_id))
+            log.error("Error {} -- Something went wrong when trying to delete the dataset {} in the workspace {}".format(response.status_code, dataset_id, workspace_id))
             return None
-    else:
-        log.error("Error 400 -- Please, make sure the name_conflict parameter is either \"CreateOrOverwrite\", \"GenerateUniqueName\", \"Ignore\" or \"Overwrite\"")
-        return None
 
-def clone_report(workspace_id: str, report_id: str, dest_report_name: str, dest_workspace_id: str = None) -> dict:
-    global token
-    if(not verify_token()): return None
-    
-    headers = { "Authorization": token["bearer"] }
-    if dest_workspace_id: body = { "name": dest_report_name, "targetWorkspaceId": dest_workspace_id }
-    else: body = { "name": dest_report_name }
+    def refresh_dataset(self, workspace_id: str, dataset_id: str, notify_option: str = "NoNotification") -> dict:
+        if(not self.verify_token()): return None
 
-    response = requests.post("https://api.powerbi.com/v1.0/myorg/groups/{}/reports/{}/clone".format(workspace_id, report_id), headers = headers, data = body)
+        if(notify_option in ["MailOnCompletion", "MailOnFailure", "NoNotification"]):
+            headers = { "Authorization": self.token["bearer"] }
+            body = { "notifyOption": notify_option }
+            response = self.request("POST", "groups/{}/datasets/{}/refreshes".format(workspace_id, dataset_id), headers = headers, data = body)
 
-    if response.status_code == HTTP_OK:
-        return { "response": response.status_code }
-    else:
-        log.error("Error {} -- Something went wrong when trying to clone the report {} in the workspace {}".format(response.status_code, report_id, workspace_id))
-        return None
+            if response.status_code == HTTP_ACCEPTED:
+                return { "response": response.status_code }
+            else:
+                log.error("Error {} -- Something went wrong when trying to refresh the dataset {} in the workspace {}".format(response.status_code, dataset_id, workspace_id))
+                return None
+        else:
+            log.error("Error 400 -- Please, make sure the notify_option parameter is either \"MailOnCompletion\", \"MailOnFailure\" or \"NoNotification\"")
+            return None
 
-# Dataset
-def get_datasets(workspace_id: str) -> list:
-    global token
-    if(not verify_token()): return None
+    def get_refresh_history(self, workspace_id: str, dataset_id: str, top: int = None) -> list:
+        if(not self.verify_token()): return None
 
-    headers = { "Authorization": token["bearer"] }
-    response = requests.get("https://api.powerbi.com/v1.0/myorg/groups/{}/datasets".format(workspace_id), headers = headers)
+        headers = { "Authorization": self.token["bearer"] }
+        if top: response = self.request("GET", "groups/{}/datasets/{}/refreshes?$top={}".format(workspace_id, dataset_id, top), headers = headers)
+        else: response = self.request("GET", "groups/{}/datasets/{}/refreshes".format(workspace_id, dataset_id), headers = headers)
 
-    if response.status_code == HTTP_OK:
-        return response.json()["value"]
-    else:
-        log.error("Error {} -- Something went wrong when trying to retrieve the list of datasets in the workspace {}".format(response.status_code, workspace_id))
-        return None
+        if response.status_code == HTTP_OK:
+            return response.json()["value"]
+        else:
+            log.error("Error {} -- Something went wrong when trying to retrieve the refresh history of the dataset {} in the workspace {}".format(response.status_code, dataset_id, workspace_id))
+            return None
 
-def get_dataset(workspace_id: str, dataset_id: str) -> list:
-    global token
-    if(not verify_token()): return None
+    # Admin
+    def _iter_audit_log_pages(self, url: str, start_date: str, end_date: str):
+        while url:
+            # The consumer can pause between pages for longer than a token lives, so each page gets the current one
+            if(not self.verify_token()): raise AuditLogError(401, "The token could not be renewed while retrieving audit logs from {} to {}".format(start_date, end_date))
+            headers = { "Authorization": self.token["bearer"] }
+            response = self.request("GET", url, headers = headers)
 
-    headers = { "Authorization": token["bearer"] }
-    response = requests.get("https://api.powerbi.com/v1.0/myorg/groups/{}/datasets/{}".format(workspace_id, dataset_id), headers = headers)
+            if response.status_code != HTTP_OK:
+                message = "Something went wrong when trying to retrieve audit logs from {} to {}".format(start_date, end_date)
+                log.error("Error {} -- {}".format(response.status_code, message))
+                raise AuditLogError(response.status_code, message)
 
-    if response.status_code == HTTP_OK:
-        return response.json()["value"]
-    else:
-        log.error("Error {} -- Something went wrong when trying to retrieve the dataset {} in the workspace {}".format(response.status_code, dataset_id, workspace_id))
-        return None
+            # Parse each page once, and keep nothing but the continuation URI between pages
+            result = response.json()
+            if metrics.active: metrics.active.record_page(url)
+            yield result["activityEventEntities"]
 
-def delete_dataset(workspace_id: str, dataset_id: str) -> dict:
-    global token
-    if(not verify_token()): return None
+            if result.get("lastResultSet"): url = None
+            else: url = result.get("continuationUri")
+
+    def iter_audit_logs(self, start_date: str, end_date: str, activity: str = None, user_id: str = None, pages: bool = False):
+        if(not self.verify_token()): return None
 
-    headers = { "Authorization": token["bearer"] }
-    response = requests.delete("https://api.powerbi.com/v1.0/myorg/groups/{}/datasets/{}".format(workspace_id, dataset_id), headers = headers)
+        url = _audit_logs_url(start_date, end_date, activity, user_id)
+        if url is None:
+            log.error("Error 400 -- Please, make sure the dates you gave match the following pattern: YYYY-MM-DD HH:MM:SS")
+            return None
 
-    if response.status_code == HTTP_OK:
-        return { "response": response.status_code }
-    else:
-        log.error("Error {} -- Something went wrong when trying to delete the dataset {} in the workspace {}".format(response.status_code, dataset_id, workspace_id))
-        return None
+        page_iterator = self._iter_audit_log_pages(url, start_date, end_date)
 
-def refresh_dataset(workspace_id: str, dataset_id: str, notify_option: str = "NoNotification") -> dict:
-    global token
-    if(not verify_token()): return None
+        if pages: return page_iterator
+        else: return _iter_audit_log_events(page_iterator)
 
-    if(notify_option in ["MailOnCompletion", "MailOnFailure", "NoNotification"]):
-        headers = { "Authorization": token["bearer"] }
-        body = { "notifyOption": notify_option }
-        response = requests.post("https://api.powerbi.com/v1.0/myorg/groups/{}/datasets/{}/refreshes".format(workspace_id, dataset_id), headers = headers, data = body)
+    def get_audit_logs(self, start_date: str, end_date: str, activity: str = None, user_id: str = None) -> list:
+        events = self.iter_audit_logs(start_date, end_date, activity, user_id)
+        if events is None: return None
 
-        if response.status_code == HTTP_ACCEPTED:
-            return { "response": response.status_code }
-        else:
-            log.error("Error {} -- Something went wrong when trying to refresh the dataset {} in the workspace {}".format(response.status_code, dataset_id, workspace_id))
+        try:
+            return list(events)
+        except AuditLogError:
             return None
-    else:
-        log.error("Error 400 -- Please, make sure the notify_option parameter is either \"MailOnCompletion\", \"MailOnFailure\" or \"NoNotification\"")
-        return None
 
-# Admin
-def get_audit_logs(start_date: str, end_date: str, activity: str = None, user_id: str = None) -> list:
+    def export_audit_logs(self, start_date: str, end_date: str, out_file: str, activity: str = None, user_id: str = None) -> dict:
+        events = self.iter_audit_logs(start_date, end_date, activity, user_id)
+        if events is None: return None
+
+        # Events go to a temporary file that only replaces out_file once every page was written
+        part_file = out_file + ".part"
+        count = 0
+        try:
+            with open(part_file, "w", encoding = "utf-8") as file:
+                for event in events:
+                    file.write(json.dumps(event))
+                    file.write("\n")
+                    count += 1
+        except AuditLogError:
+            os.remove(part_file)
+            return None
+        except BaseException:
+            os.remove(part_file)
+            raise
+
+        os.replace(part_file, out_file)
+        return { "response": HTTP_OK, "events": count }
+
+default_client = Client()
+token_manager = default_client.token_manager
+token = default_client.token
+credentials = default_client.credentials
+
+def get_default_client() -> Client:
+    return default_client
+
+def set_default_client(client: Client) -> None:
+    global default_client
+    global token_manager
     global token
-    if(not verify_token()): return None
+    global credentials
+    default_client = client
+    token_manager = client.token_manager
+    token = client.token
+    credentials = client.credentials
 
-    date_regex = r"^\d\d\d\d-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01]) (00|1[0-9]|2[0-3]):([0-5][0-9]):([0-5][0-9])$"
-    start_date_verification = re.search(date_regex, start_date)
-    end_date_verification = re.search(date_regex, end_date)
-    
-    if(start_date_verification and end_date_verification):
-        start_date_value = datetime.datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%dT%H:%M:%S.000Z")
-        end_date_value = datetime.datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%dT%H:%M:%S.000Z")
+def connect(client_id: str, username: str, password: str, tenant_id: str = "common", client_secret: str = None, cache_file: str = None) -> None:
+    return default_client.connect(client_id, username, password, tenant_id, client_secret, cache_file)
 
-        headers = { "Authorization": token["bearer"] }
-        params = ""
+def verify_token() -> bool:
+    return default_client.verify_token()
 
-        if activity:
-            params += "Activity eq '{}'".format(activity)
-        if user_id:
-            if params != "": params += " and "
-            params += "UserId eq '{}'".format(user_id)
+def get_token() -> dict:
+    return default_client.get_token()
 
-        if params == "": url = "https://api.powerbi.com/v1.0/myorg/admin/activityevents?startDateTime='{}'&endDateTime='{}'".format(start_date_value, end_date_value)
-        else: url = "https://api.powerbi.com/v1.0/myorg/admin/activityevents?startDateTime='{}'&endDateTime='{}'&$filter={}".format(start_date_value, end_date_value, params)
+def set_token(bearer: str, expires_in: float = 3600) -> None:
+    return default_client.set_token(bearer, expires_in)
 
-        response = requests.get(url, headers = headers)
+def set_credentials(client_id: str, username: str, password: str, tenant_id: str, client_secret: str) -> None:
+    return default_client.set_credentials(client_id, username, password, tenant_id, client_secret)
 
-        if response.status_code == HTTP_OK:
-            logs = []
-            while(response.json()["continuationUri"] != None):
-                logs += response.json()["activityEventEntities"]
-                response = requests.get(response.json()["continuationUri"], headers = headers)
+# Cache
+def enable_cache(ttl: dict = None, max_entries: int = 1024) -> MetadataCache:
+    return default_client.enable_cache(ttl, max_entries)
 
-                if response.status_code != HTTP_OK:
-                    log.error("Error {} -- Something went wrong when trying to retrieve audit logs from {} to {}".format(response.status_code, start_date, end_date))
-                    return None
+def disable_cache() -> None:
+    return default_client.disable_cache()
 
-            return logs
-        else:
-            log.error("Error {} -- Something went wrong when trying to retrieve audit logs from {} to {}".format(response.status_code, start_date, end_date))
-            print(response.json())
-            return None
-    else:
-        log.error("Error 400 -- Please, make sure the dates you gave match the following pattern: YYYY-MM-DD HH:MM:SS")
-        return None
\ No newline at end of file
+# Workspace
+def get_workspaces() -> list:
+    return default_client.get_workspaces()
+
+def get_workspace(workspace_id: str) -> list:
+    return default_client.get_workspace(workspace_id)
+
+def get_workspace_by_name(workspace_name: str) -> dict:
+    return default_client.get_workspace_by_name(workspace_name)
+
+def create_workspace(workspace_name: str, new: bool = False) -> dict:
+    return default_client.create_workspace(workspace_name, new)
+
+def delete_workspace(workspace_id: str) -> dict:
+    return default_client.delete_workspace(workspace_id)
+
+def get_users_in_workspace(workspace_id: str) -> list:
+    return default_client.get_users_in_workspace(workspace_id)
+
+def add_user_to_workspace(workspace_id: str, email: str, access: str = "Member") -> dict:
+    return default_client.add_user_to_workspace(workspace_id, email, access)
+
+def delete_user_from_workspace(workspace_id: str, email: str) -> dict:
+    return default_client.delete_user_from_workspace(workspace_id, email)
+
+def update_user_in_workspace(workspace_id: str, email: str, access: str = "Member") -> dict:
+    return default_client.update_user_in_workspace(workspace_id, email, access)
+
+# Report
+def get_reports(workspace_id: str) -> list:
+    return default_client.get_reports(workspace_id)
+
+def get_report(workspace_id: str, report_id: str) -> list:
+    return default_client.get_report(workspace_id, report_id)
+
+def get_report_by_name(workspace_id: str, report_name: str) -> dict:
+    return default_client.get_report_by_name(workspace_id, report_name)
+
+def delete_report(workspace_id: str, report_id: str) -> dict:
+    return default_client.delete_report(workspace_id, report_id)
+
+def export_report(workspace_id: str, report_id: str, out_file: str, chunk_size: int = 1048576, resume: bool = False, checksum: str = None, progress = None, retries: int = 3) -> dict:
+    return default_client.export_report(workspace_id, report_id, out_file, chunk_size, resume, checksum, progress, retries)
+
+def import_report(workspace_id: str, report_name: str, in_file: str, name_conflict: str = "CreateOrOverwrite", chunk_size: int = 1048576) -> dict:
+    return default_client.import_report(workspace_id, report_name, in_file, name_conflict, chunk_size)
+
+def get_import(workspace_id: str, import_id: str) -> dict:
+    return default_client.get_import(workspace_id, import_id)
+
+def clone_report(workspace_id: str, report_id: str, dest_report_name: str, dest_workspace_id: str = None) -> dict:
+    return default_client.clone_report(workspace_id, report_id, dest_report_name, dest_workspace_id)
+
+# Dataset
+def get_datasets(workspace_id: str) -> list:
+    return default_client.get_datasets(workspace_id)
+
+def get_dataset(workspace_id: str, dataset_id: str) -> list:
+    return default_client.get_dataset(workspace_id, dataset_id)
+
+def get_dataset_by_name(workspace_id: str, dataset_name: str) -> dict:
+    return default_client.get_dataset_by_name(workspace_id, dataset_name)
+
+def delete_dataset(workspace_id: str, dataset_id: str) -> dict:
+    return default_client.delete_dataset(workspace_id, dataset_id)
+
+def refresh_dataset(workspace_id: str, dataset_id: str, notify_option: str = "NoNotification") -> dict:
+    return default_client.refresh_dataset(workspace_id, dataset_id, notify_option)
+
+def get_refresh_history(workspace_id: str, dataset_id: str, top: int = None) -> list:
+    return default_client.get_refresh_history(workspace_id, dataset_id, top)
+
+# Admin
+def iter_audit_logs(start_date: str, end_date: str, activity: str = None, user_id: str = None, pages: bool = False):
+    return default_client.iter_audit_logs(start_date, end_date, activity, user_id, pages)
+
+def get_audit_logs(start_date: str, end_date: str, activity: str = None, user_id: str = None) -> list:
+    return default_client.get_audit_logs(start_date, end_date, activity, user_id)
+
+def export_audit_logs(start_date: str, end_date: str, out_file: str, activity: str = None, user_id: str = None) -> dict:
+    return default_client.export_audit_logs(start_date, end_date, out_file, activity, user_id)
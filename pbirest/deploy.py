@@ -0,0 +1,92 @@
+import collections
+import concurrent.futures
+import time
+
+from . import core
+from . import imports
+from .core import log
+
+def _deploy_one(workspace_id: str, capacity_id: str, queued: float, deploy) -> dict:
+    result = { "workspace_id": workspace_id, "capacity_id": capacity_id, "status": None, "result": None, "queued_seconds": 0.0, "seconds": 0.0 }
+    started = time.monotonic()
+    result["queued_seconds"] = started - queued
+    try:
+        result["result"] = deploy(workspace_id)
+    except Exception as error:
+        log.error("Error -- Something went wrong when trying to deploy to the workspace {}: {}".format(workspace_id, error))
+        result["result"] = None
+    result["seconds"] = time.monotonic() - started
+
+    result["status"] = "Succeeded" if result["result"] is not None else "Failed"
+    return result
+
+def workspace_capacities(targets: list, client: core.Client = None) -> dict:
+    workspaces = (client or core).get_workspaces() or []
+    return { workspace["id"]: workspace.get("capacityId") for workspace in workspaces if workspace["id"] in targets }
+
+def _run_deployment(targets: list, deploy, workers: int, capacity_limits: dict, default_capacity_limit: int, capacities: dict, client: core.Client) -> list:
+    if capacities is None and (capacity_limits or default_capacity_limit): capacities = workspace_capacities(targets, client)
+    capacities = capacities or {}
+
+    def limit(capacity_id: str) -> int:
+        # Workspaces on shared capacity are not limited
+        if capacity_id is None: return None
+        capacity_limit = (capacity_limits or {}).get(capacity_id, default_capacity_limit)
+        return max(1, capacity_limit) if capacity_limit is not None else None
+
+    # One queue per capacity: a target is only handed to a worker once its capacity has a free slot,
+    # so no worker sits waiting on a busy capacity while targets on other capacities are queued
+    queues = collections.OrderedDict()
+    for index, workspace_id in enumerate(targets):
+        queues.setdefault(capacities.get(workspace_id), collections.deque()).append((index, workspace_id))
+
+    queued = time.monotonic()
+    results = [None] * len(targets)
+    running = {}
+    pending = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+        while queues or pending:
+            submitted = True
+            while submitted and len(pending) < workers:
+                # Capacities take turns, so each one with a free slot gets its next target
+                submitted = False
+                for capacity_id in list(queues):
+                    if len(pending) >= workers: break
+                    capacity_limit = limit(capacity_id)
+                    if capacity_limit is not None and running.get(capacity_id, 0) >= capacity_limit: continue
+
+                    index, workspace_id = queues[capacity_id].popleft()
+                    if not queues[capacity_id]: del queues[capacity_id]
+                    running[capacity_id] = running.get(capacity_id, 0) + 1
+                    pending[executor.submit(_deploy_one, workspace_id, capacity_id, queued, deploy)] = (index, capacity_id)
+                    submitted = True
+
+            done, not_done = concurrent.futures.wait(pending, return_when = concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                index, capacity_id = pending.pop(future)
+                running[capacity_id] -= 1
+                results[index] = future.result()
+
+    failed = failed_targets(results)
+    if failed: log.error("Error -- The deployment failed for {} of {} workspaces".format(len(failed), len(targets)))
+    return results
+
+def deploy_pbix(in_file: str, report_name: str, targets: list, name_conflict: str = "CreateOrOverwrite", wait: bool = True, workers: int = 8, capacity_limits: dict = None, default_capacity_limit: int = None, capacities: dict = None, client: core.Client = None) -> list:
+    def deploy(workspace_id: str) -> dict:
+        result = (client or core).import_report(workspace_id, report_name, in_file, name_conflict)
+        if result is None or not wait: return result
+
+        status = imports.wait_for_import(workspace_id, result["id"], client = client)
+        if status is None or status.get("importState") != "Succeeded": return None
+        return status
+
+    return _run_deployment(targets, deploy, workers, capacity_limits, default_capacity_limit, capacities, client)
+
+def deploy_clone(workspace_id: str, report_id: str, report_name: str, targets: list, workers: int = 8, capacity_limits: dict = None, default_capacity_limit: int = None, capacities: dict = None, client: core.Client = None) -> list:
+    def deploy(target_workspace_id: str) -> dict:
+        return (client or core).clone_report(workspace_id, report_id, report_name, target_workspace_id)
+
+    return _run_deployment(targets, deploy, workers, capacity_limits, default_capacity_limit, capacities, client)
+
+def failed_targets(results: list) -> list:
+    return [result["workspace_id"] for result in results if result["status"] != "Succeeded"]
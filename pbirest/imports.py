@@ -0,0 +1,40 @@
+import heapq
+import random
+import time
+
+from . import core
+from .core import log
+
+IMPORT_STATES_DONE = ["Succeeded", "Failed"]
+
+def next_poll_delay(delay: float, max_delay: float) -> float:
+    return min(max_delay, delay * 2)
+
+def jitter(delay: float) -> float:
+    return delay * random.uniform(0.5, 1.0)
+
+def wait_for_imports(imports: list, timeout: float = 3600, initial_delay: float = 1.0, max_delay: float = 30.0, client: core.Client = None) -> dict:
+    # Every import is polled from this thread: a heap keeps them ordered by their next poll time
+    started = time.monotonic()
+    pending = [(started, workspace_id, import_id, initial_delay) for workspace_id, import_id in imports]
+    heapq.heapify(pending)
+    results = {}
+
+    while pending:
+        due, workspace_id, import_id, delay = heapq.heappop(pending)
+        wait = due - time.monotonic()
+        if wait > 0: time.sleep(wait)
+
+        status = (client or core).get_import(workspace_id, import_id)
+        if status is None or status.get("importState") in IMPORT_STATES_DONE:
+            results[import_id] = status
+        elif time.monotonic() - started >= timeout:
+            log.warning("The import {} in the workspace {} is still {} after {}s".format(import_id, workspace_id, status.get("importState"), timeout))
+            results[import_id] = status
+        else:
+            heapq.heappush(pending, (time.monotonic() + jitter(delay), workspace_id, import_id, next_poll_delay(delay, max_delay)))
+
+    return results
+
+def wait_for_import(workspace_id: str, import_id: str, timeout: float = 3600, initial_delay: float = 1.0, max_delay: float = 30.0, client: core.Client = None) -> dict:
+    return wait_for_imports([(workspace_id, import_id)], timeout, initial_delay, max_delay, client)[import_id]
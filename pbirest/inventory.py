@@ -0,0 +1,107 @@
+import concurrent.futures
+import datetime
+import json
+import os
+
+from . import core
+from .core import log
+
+SNAPSHOT_VERSION = 1
+SECTIONS = ["reports", "datasets", "users"]
+
+def _user_key(user: dict) -> str:
+    return user.get("identifier") or user.get("emailAddress") or user.get("displayName")
+
+def _index(items: list, key = None) -> dict:
+    if items is None: return None
+    return { (key(item) if key else item["id"]): item for item in items }
+
+def crawl_inventory(workers: int = 16, client: core.Client = None) -> dict:
+    api = client or core
+    workspaces = api.get_workspaces()
+    if workspaces is None: return None
+
+    fetchers = { "reports": (api.get_reports, None), "datasets": (api.get_datasets, None), "users": (api.get_users_in_workspace, _user_key) }
+    inventory = { "version": SNAPSHOT_VERSION, "created": datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"), "workspaces": {}, "errors": [] }
+    for workspace in workspaces:
+        inventory["workspaces"][workspace["id"]] = { "workspace": workspace, "reports": None, "datasets": None, "users": None }
+
+    # Every (workspace, section) listing is an independent call, so they all go to the pool at once
+    with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+        futures = {}
+        for workspace in workspaces:
+            for section in SECTIONS:
+                futures[executor.submit(fetchers[section][0], workspace["id"])] = (workspace["id"], section)
+
+        for future in concurrent.futures.as_completed(futures):
+            workspace_id, section = futures[future]
+            try:
+                items = future.result()
+            except Exception as error:
+                log.error("Error -- Something went wrong when trying to retrieve the {} of the workspace {}: {}".format(section, workspace_id, error))
+                items = None
+
+            if items is None: inventory["errors"].append({ "workspace_id": workspace_id, "section": section })
+            inventory["workspaces"][workspace_id][section] = _index(items, fetchers[section][1])
+
+    return inventory
+
+def _diff_items(before: dict, after: dict, workspace_id: str, result: dict) -> None:
+    scope = { "workspace_id": workspace_id } if workspace_id else {}
+    for key in after.keys() - before.keys(): result["added"].append(dict(after[key], **scope))
+    for key in before.keys() - after.keys(): result["removed"].append(dict(before[key], **scope))
+    for key in after.keys() & before.keys():
+        if after[key] != before[key]: result["changed"].append(dict(scope, id = key, before = before[key], after = after[key]))
+
+def diff_inventory(previous: dict, current: dict) -> dict:
+    diff = { section: { "added": [], "removed": [], "changed": [] } for section in ["workspaces"] + SECTIONS }
+    before = previous["workspaces"] if previous else {}
+    after = current["workspaces"]
+
+    _diff_items({ key: value["workspace"] for key, value in before.items() }, { key: value["workspace"] for key, value in after.items() }, None, diff["workspaces"])
+    for workspace_id in after.keys() | before.keys():
+        for section in SECTIONS:
+            old = before[workspace_id][section] if workspace_id in before else {}
+            new = after[workspace_id][section] if workspace_id in after else {}
+            # A listing that failed in either run is unknown, not empty: it must not show up as removals
+            if old is None or new is None: continue
+            _diff_items(old, new, workspace_id, diff[section])
+
+    for section in diff.values():
+        for kind in section.values(): kind.sort(key = lambda item: (item.get("workspace_id") or "", item.get("id") or ""))
+    return diff
+
+def _write_json(path: str, value) -> None:
+    temp_file = path + ".tmp"
+    with open(temp_file, "w", encoding = "utf-8") as file: json.dump(value, file, sort_keys = True)
+    os.replace(temp_file, path)
+
+def latest_snapshot(directory: str) -> str:
+    if not os.path.isdir(directory): return None
+    snapshots = sorted(name for name in os.listdir(directory) if name.startswith("inventory-") and name.endswith(".json"))
+    if not snapshots: return None
+    return os.path.join(directory, snapshots[-1])
+
+def load_snapshot(path: str) -> dict:
+    with open(path, "r", encoding = "utf-8") as file: snapshot = json.load(file)
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        log.error("Error -- The inventory snapshot {} has version {}, expected {}".format(path, snapshot.get("version"), SNAPSHOT_VERSION))
+        return None
+    return snapshot
+
+def snapshot_inventory(directory: str, workers: int = 16, client: core.Client = None) -> dict:
+    current = crawl_inventory(workers, client)
+    if current is None: return None
+
+    os.makedirs(directory, exist_ok = True)
+    previous_path = latest_snapshot(directory)
+    previous = load_snapshot(previous_path) if previous_path else None
+    diff = diff_inventory(previous, current)
+
+    stamp = current["created"].replace("-", "").replace(":", "")
+    snapshot_path = os.path.join(directory, "inventory-{}.json".format(stamp))
+    diff_path = os.path.join(directory, "diff-{}.json".format(stamp))
+    _write_json(snapshot_path, current)
+    _write_json(diff_path, { "version": SNAPSHOT_VERSION, "previous": previous_path and os.path.basename(previous_path), "current": os.path.basename(snapshot_path), "changes": diff })
+
+    return { "snapshot": snapshot_path, "previous": previous_path, "diff": diff, "errors": current["errors"] }
@@ -0,0 +1,140 @@
+import re
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COLLECTIONS = ["groups", "reports", "datasets", "imports", "users", "refreshes", "dashboards", "capacities"]
+
+_api_path = re.compile(r"^https?://[^/]+/v1\.0/myorg/")
+_login_path = re.compile(r"/oauth2/")
+
+def endpoint(url: str) -> str:
+    # Ids are replaced by {id} so that every call of the same endpoint shares its metrics
+    if _login_path.search(url): return "login"
+    path = _api_path.sub("", url.split("?", 1)[0])
+    segments = path.strip("/").split("/")
+    for index in range(1, len(segments)):
+        if segments[index - 1] in COLLECTIONS and segments[index] not in COLLECTIONS: segments[index] = "{id}"
+    return "/".join(segments)
+
+class Metrics:
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.started = time.time()
+            self.latency = {}
+            self.responses = {}
+            self.retries = {}
+            self.throttled = {}
+            self.bytes_sent = {}
+            self.bytes_received = {}
+            self.pages = {}
+            self.token_refreshes = {}
+
+    def add_listener(self, listener) -> None:
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener) -> None:
+        self.listeners.remove(listener)
+
+    def _emit(self, event: dict) -> None:
+        for listener in self.listeners: listener(event)
+
+    def record_request(self, method: str, url: str, status: int, seconds: float, bytes_sent: int = 0, bytes_received: int = 0) -> None:
+        name = endpoint(url)
+        with self.lock:
+            histogram = self.latency.get((name, method))
+            if histogram is None:
+                histogram = self.latency[(name, method)] = { "buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0 }
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound: histogram["buckets"][index] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+            key = (name, method, str(status))
+            self.responses[key] = self.responses.get(key, 0) + 1
+            self.bytes_sent[name] = self.bytes_sent.get(name, 0) + bytes_sent
+            self.bytes_received[name] = self.bytes_received.get(name, 0) + bytes_received
+        if self.listeners: self._emit({ "type": "request", "endpoint": name, "method": method, "status": status, "seconds": seconds, "bytes_sent": bytes_sent, "bytes_received": bytes_received })
+
+    def record_retry(self, url: str, reason: str) -> None:
+        name = endpoint(url)
+        with self.lock: self.retries[(name, reason)] = self.retries.get((name, reason), 0) + 1
+        if self.listeners: self._emit({ "type": "retry", "endpoint": name, "reason": reason })
+
+    def record_throttle(self, url: str, seconds: float) -> None:
+        name = endpoint(url)
+        with self.lock: self.throttled[name] = self.throttled.get(name, 0.0) + seconds
+        if self.listeners: self._emit({ "type": "throttle", "endpoint": name, "seconds": seconds })
+
+    def record_page(self, url: str) -> None:
+        name = endpoint(url)
+        with self.lock: self.pages[name] = self.pages.get(name, 0) + 1
+        if self.listeners: self._emit({ "type": "page", "endpoint": name })
+
+    def record_token_refresh(self, success: bool) -> None:
+        result = "success" if success else "failure"
+        with self.lock: self.token_refreshes[result] = self.token_refreshes.get(result, 0) + 1
+        if self.listeners: self._emit({ "type": "token_refresh", "result": result })
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "seconds": time.time() - self.started,
+                "latency": { "{} {}".format(method, name): { "count": histogram["count"], "sum": histogram["sum"], "buckets": dict(zip(self.buckets, histogram["buckets"])) } for (name, method), histogram in self.latency.items() },
+                "responses": { "{} {} {}".format(method, name, status): count for (name, method, status), count in self.responses.items() },
+                "retries": { "{} {}".format(name, reason): count for (name, reason), count in self.retries.items() },
+                "throttled_seconds": dict(self.throttled),
+                "bytes_sent": dict(self.bytes_sent),
+                "bytes_received": dict(self.bytes_received),
+                "pages": dict(self.pages),
+                "token_refreshes": dict(self.token_refreshes)
+            }
+
+    def to_prometheus(self) -> str:
+        def labels(**values) -> str:
+            return "{" + ",".join("{}=\"{}\"".format(key, str(value).replace("\\", "\\\\").replace("\"", "\\\"")) for key, value in values.items()) + "}"
+
+        lines = []
+        with self.lock:
+            lines += ["# HELP pbirest_request_duration_seconds Duration of the requests sent to the Power BI REST API.", "# TYPE pbirest_request_duration_seconds histogram"]
+            for (name, method), histogram in sorted(self.latency.items()):
+                for bound, count in zip(self.buckets, histogram["buckets"]):
+                    lines.append("pbirest_request_duration_seconds_bucket{} {}".format(labels(endpoint = name, method = method, le = bound), count))
+                lines.append("pbirest_request_duration_seconds_bucket{} {}".format(labels(endpoint = name, method = method, le = "+Inf"), histogram["count"]))
+                lines.append("pbirest_request_duration_seconds_sum{} {}".format(labels(endpoint = name, method = method), histogram["sum"]))
+                lines.append("pbirest_request_duration_seconds_count{} {}".format(labels(endpoint = name, method = method), histogram["count"]))
+
+            counters = [
+                ("pbirest_responses_total", "Responses by status code.", { labels(endpoint = name, method = method, status = status): count for (name, method, status), count in self.responses.items() }),
+                ("pbirest_retries_total", "Retried requests.", { labels(endpoint = name, reason = reason): count for (name, reason), count in self.retries.items() }),
+                ("pbirest_throttled_seconds_total", "Time spent waiting on rate limits.", { labels(endpoint = name): value for name, value in self.throttled.items() }),
+                ("pbirest_bytes_sent_total", "Request body bytes.", { labels(endpoint = name): value for name, value in self.bytes_sent.items() }),
+                ("pbirest_bytes_received_total", "Response body bytes.", { labels(endpoint = name): value for name, value in self.bytes_received.items() }),
+                ("pbirest_pages_total", "Result pages fetched.", { labels(endpoint = name): value for name, value in self.pages.items() }),
+                ("pbirest_token_refreshes_total", "Token requests.", { labels(result = result): value for result, value in self.token_refreshes.items() })
+            ]
+            for metric, help, values in counters:
+                lines += ["# HELP {} {}".format(metric, help), "# TYPE {} counter".format(metric)]
+                for key in sorted(values): lines.append("{}{} {}".format(metric, key, values[key]))
+
+        return "\n".join(lines) + "\n"
+
+# Instrumentation is off unless enabled: the hooks only check this global
+active = None
+
+def enable_metrics(buckets: tuple = DEFAULT_BUCKETS) -> Metrics:
+    global active
+    active = Metrics(buckets)
+    return active
+
+def disable_metrics() -> None:
+    global active
+    active = None
+
+def get_metrics() -> Metrics:
+    return active
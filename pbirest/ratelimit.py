@@ -0,0 +1,123 @@
+import email.utils
+import logging
+import random
+import requests
+import threading
+import time
+
+from . import metrics
+
+log = logging.getLogger("pbirest")
+
+HTTP_TOO_MANY_REQUESTS = 429
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+IDEMPOTENT_METHODS = ["GET", "HEAD", "OPTIONS", "PUT", "DELETE"]
+
+class TokenBucket:
+    def __init__(self, rate: float = None, capacity: float = None):
+        # rate is in requests per second, None means the family is only slowed down by Retry-After
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else (rate or 1)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                wait = self.paused_until - now
+
+                if self.rate:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if wait <= 0 and self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    wait = max(wait, (1 - self.tokens) / self.rate)
+                elif wait <= 0:
+                    return waited
+
+            time.sleep(wait)
+            waited += wait
+
+    def pause(self, seconds: float) -> None:
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+def endpoint_family(url: str) -> str:
+    if "/oauth2/" in url: return "login"
+    if "/admin/" in url: return "admin"
+    if "/refreshes" in url: return "refreshes"
+    return "groups"
+
+def parse_retry_after(value: str) -> float:
+    if not value: return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        date = email.utils.parsedate_tz(value)
+        if date is None: return None
+        return max(0.0, email.utils.mktime_tz(date) - time.time())
+
+class RateLimiter:
+    def __init__(self, limits: dict = None, retries: int = 5, backoff: float = 1.0, max_backoff: float = 60.0):
+        # limits maps an endpoint family (admin, groups, refreshes, login) to (requests per second, burst)
+        self.limits = limits or {}
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def copy(self) -> "RateLimiter":
+        # Same limits and retry policy, with buckets of its own
+        return RateLimiter(self.limits, self.retries, self.backoff, self.max_backoff)
+
+    def bucket(self, family: str) -> TokenBucket:
+        with self.lock:
+            if family not in self.buckets:
+                rate, capacity = self.limits.get(family, (None, None))
+                self.buckets[family] = TokenBucket(rate, capacity)
+            return self.buckets[family]
+
+    def delay(self, attempt: int) -> float:
+        return min(self.max_backoff, self.backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+    def send(self, method: str, url: str, send, body = None) -> requests.Response:
+        bucket = self.bucket(endpoint_family(url))
+        # A streamed body can only be sent again if it can be rewound
+        replayable = body is None or not hasattr(body, "read") or hasattr(body, "rewind")
+        attempt = 0
+
+        while True:
+            waited = bucket.acquire()
+            if waited and metrics.active: metrics.active.record_throttle(url, waited)
+            try:
+                response = send()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                if method not in IDEMPOTENT_METHODS or not replayable or attempt >= self.retries: raise
+                delay = self.delay(attempt)
+                log.warning("Retrying {} {} in {:.1f}s after {}".format(method, url, delay, type(error).__name__))
+                if metrics.active: metrics.active.record_retry(url, type(error).__name__)
+                time.sleep(delay)
+            else:
+                status = response.status_code
+                if status not in RETRY_STATUSES or attempt >= self.retries or not replayable: return response
+                # Throttled requests were never processed, so they are retried whatever their method
+                if status != HTTP_TOO_MANY_REQUESTS and method not in IDEMPOTENT_METHODS: return response
+
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                delay = retry_after if retry_after is not None else self.delay(attempt)
+                response.close()
+                log.warning("Error {} -- Retrying {} {} in {:.1f}s".format(status, method, url, delay))
+                if metrics.active: metrics.active.record_retry(url, str(status))
+
+                # Throttling applies to the whole endpoint family, so every thread waits on the bucket
+                if status == HTTP_TOO_MANY_REQUESTS: bucket.pause(delay)
+                else: time.sleep(delay)
+
+            if body is not None and hasattr(body, "rewind"): body.rewind()
+            attempt += 1
@@ -0,0 +1,160 @@
+import calendar
+import heapq
+import time
+
+from . import core
+from .core import log
+from .deploy import workspace_capacities
+from .imports import jitter, next_poll_delay
+
+REFRESH_STATES_DONE = ["Completed", "Failed", "Disabled", "Cancelled"]
+HISTORY_ATTEMPTS = 3
+
+def _timestamp(value: str) -> float:
+    if not value: return None
+    fraction = value[19:].rstrip("Z")
+    return calendar.timegm(time.strptime(value[:19], "%Y-%m-%dT%H:%M:%S")) + (float(fraction) if fraction.startswith(".") and len(fraction) > 1 else 0.0)
+
+def _refresh_key(refresh: dict) -> tuple:
+    if not refresh: return None
+    return (refresh.get("requestId"), refresh.get("startTime"))
+
+def _last_duration(history: list) -> float:
+    # Duration of the last completed refresh, used to decide when to poll a new one
+    for refresh in history or []:
+        if refresh.get("status") == "Completed" and refresh.get("endTime"):
+            return _timestamp(refresh["endTime"]) - _timestamp(refresh["startTime"])
+    return None
+
+def _poll_delay(job: dict, initial_delay: float, max_delay: float) -> float:
+    if job["expected_seconds"] is not None:
+        remaining = job["expected_seconds"] - (time.time() - job["triggered"])
+        if remaining > 0: return min(max_delay, max(initial_delay, remaining / 2))
+
+    delay = job["delay"]
+    job["delay"] = next_poll_delay(delay, max_delay)
+    return jitter(delay)
+
+def _result(job: dict) -> dict:
+    return { key: job[key] for key in ["workspace_id", "dataset_id", "capacity_id", "status", "queued_seconds", "run_seconds", "error"] }
+
+def refresh_datasets(datasets: list, dependencies: dict = None, capacity_limits: dict = None, default_capacity_limit: int = 1, max_parallel: int = 16, capacities: dict = None, notify_option: str = "NoNotification", timeout: float = 7200, initial_delay: float = 5.0, max_delay: float = 60.0, client: core.Client = None) -> list:
+    api = client or core
+    dependencies = dependencies or {}
+    capacity_limits = capacity_limits or {}
+    if capacities is None: capacities = workspace_capacities(list(set(workspace_id for workspace_id, dataset_id in datasets)), client)
+
+    created = time.time()
+    jobs = {}
+    for key in datasets:
+        jobs[key] = { "workspace_id": key[0], "dataset_id": key[1], "capacity_id": capacities.get(key[0]), "status": "Queued", "queued_seconds": None, "run_seconds": None, "error": None,
+                      "triggered": None, "previous": None, "expected_seconds": None, "delay": initial_delay, "retry_at": 0.0, "history_failures": 0 }
+
+    running = {}
+    polls = []
+
+    def ready(key) -> bool:
+        return all(jobs[dependency]["status"] == "Completed" for dependency in dependencies.get(key, []) if dependency in jobs)
+
+    def has_slot(job: dict) -> bool:
+        if len(running) >= max_parallel: return False
+        if job["capacity_id"] is None: return True
+        # Datasets on shared capacity are not limited, every other capacity keeps at most its limit running
+        limit = capacity_limits.get(job["capacity_id"], default_capacity_limit)
+        return sum(1 for other in running.values() if other["capacity_id"] == job["capacity_id"]) < limit
+
+    def skip_blocked() -> None:
+        # Skip the datasets that depend on a refresh that did not complete, and the ones depending on those
+        skipped = True
+        while skipped:
+            skipped = False
+            for key, job in jobs.items():
+                if job["status"] == "Queued" and any(jobs[dependency]["status"] in ["Failed", "Skipped", "Timeout", "Disabled", "Cancelled"] for dependency in dependencies.get(key, []) if dependency in jobs):
+                    job["status"] = "Skipped"
+                    skipped = True
+                    log.warning("Skipping the refresh of the dataset {} because one of its dependencies did not complete".format(key[1]))
+
+    while True:
+        skip_blocked()
+
+        for key, job in jobs.items():
+            if job["status"] != "Queued" or job["retry_at"] > time.monotonic() or not ready(key) or not has_slot(job): continue
+
+            try:
+                history = api.get_refresh_history(key[0], key[1], 1)
+            except Exception as error:
+                log.warning("Error -- Something went wrong when trying to retrieve the refresh history of the dataset {} in the workspace {}: {}".format(key[1], key[0], error))
+                history = None
+
+            # Without the last refresh, the new one could not be told apart from it, so the dataset is not triggered yet
+            if history is None:
+                job["history_failures"] += 1
+                if job["history_failures"] >= HISTORY_ATTEMPTS:
+                    job["status"] = "Failed"
+                    job["error"] = "The refresh history could not be retrieved"
+                    log.error("Error -- The refresh history of the dataset {} in the workspace {} could not be retrieved, the dataset was not refreshed".format(key[1], key[0]))
+                else:
+                    job["retry_at"] = time.monotonic() + jitter(initial_delay)
+                    heapq.heappush(polls, (job["retry_at"], key))
+                continue
+
+            job["expected_seconds"] = _last_duration(history)
+            job["previous"] = _refresh_key(history[0] if history else None)
+            job["queued_seconds"] = time.time() - created
+            job["triggered"] = time.time()
+            try:
+                triggered = api.refresh_dataset(key[0], key[1], notify_option)
+            except Exception as error:
+                # A transport error fails this refresh only, the others keep their state
+                log.error("Error -- Something went wrong when trying to refresh the dataset {} in the workspace {}: {}".format(key[1], key[0], error))
+                job["error"] = str(error)
+                triggered = None
+            if triggered is None:
+                job["status"] = "Failed"
+                continue
+
+            job["status"] = "Running"
+            running[key] = job
+            heapq.heappush(polls, (time.monotonic() + _poll_delay(job, initial_delay, max_delay), key))
+
+        if not polls:
+            skip_blocked()
+            stuck = [key for key, job in jobs.items() if job["status"] == "Queued"]
+            for key in stuck:
+                jobs[key]["status"] = "Skipped"
+                log.error("Error -- The dataset {} could not be scheduled, please check the dependencies for cycles".format(key[1]))
+            break
+
+        due, key = heapq.heappop(polls)
+        wait = due - time.monotonic()
+        if wait > 0: time.sleep(wait)
+
+        job = jobs[key]
+        # Datasets waiting to retry their history go back to the dispatch above
+        if job["status"] != "Running": continue
+        try:
+            history = api.get_refresh_history(key[0], key[1], 1)
+        except Exception as error:
+            # The refresh is still running on the service side, so a failed poll is tried again until the timeout
+            log.warning("Error -- Something went wrong when polling the refresh of the dataset {} in the workspace {}: {}".format(key[1], key[0], error))
+            history = None
+        refresh = history[0] if history else None
+
+        # The history can still show the previous refresh for a moment after the new one was requested
+        if refresh and _refresh_key(refresh) != job["previous"] and refresh.get("status") in REFRESH_STATES_DONE:
+            job["status"] = refresh["status"]
+            job["run_seconds"] = _timestamp(refresh.get("endTime")) - _timestamp(refresh["startTime"]) if refresh.get("endTime") else time.time() - job["triggered"]
+            job["error"] = refresh.get("serviceExceptionJson")
+            del running[key]
+        elif time.time() - job["triggered"] >= timeout:
+            job["status"] = "Timeout"
+            job["run_seconds"] = time.time() - job["triggered"]
+            log.warning("The refresh of the dataset {} in the workspace {} is still running after {}s".format(key[1], key[0], timeout))
+            del running[key]
+        else:
+            heapq.heappush(polls, (time.monotonic() + _poll_delay(job, initial_delay, max_delay), key))
+
+    results = [_result(jobs[key]) for key in datasets]
+    failed = [result for result in results if result["status"] != "Completed"]
+    if failed: log.error("Error -- {} of {} dataset refreshes did not complete".format(len(failed), len(results)))
+    return results
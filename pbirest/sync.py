@@ -0,0 +1,149 @@
+import concurrent.futures
+import datetime
+import json
+import sqlite3
+
+from . import audit
+from . import core
+from .core import log
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id TEXT PRIMARY KEY,
+    creation_time TEXT,
+    activity TEXT,
+    user_id TEXT,
+    workspace_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_creation_time ON events (creation_time);
+CREATE INDEX IF NOT EXISTS events_activity ON events (activity, creation_time);
+CREATE INDEX IF NOT EXISTS events_user_id ON events (user_id, creation_time);
+CREATE TABLE IF NOT EXISTS watermarks (
+    activity TEXT NOT NULL,
+    user_id TEXT NOT NULL,
+    watermark TEXT NOT NULL,
+    synced_at TEXT NOT NULL,
+    PRIMARY KEY (activity, user_id)
+);
+"""
+
+class AuditLogStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.executescript(SCHEMA)
+
+    def insert_events(self, events: list, batch_size: int = 5000) -> int:
+        inserted = 0
+        rows = []
+        for event in events:
+            rows.append((event["Id"], event.get("CreationTime"), event.get("Activity"), event.get("UserId"), event.get("WorkspaceId"), json.dumps(event)))
+            if len(rows) >= batch_size:
+                inserted += self._insert_rows(rows)
+                rows = []
+        if rows: inserted += self._insert_rows(rows)
+        return inserted
+
+    def _insert_rows(self, rows: list) -> int:
+        with self.connection:
+            before = self.connection.total_changes
+            self.connection.executemany("INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?, ?)", rows)
+            return self.connection.total_changes - before
+
+    def get_watermark(self, activity: str = None, user_id: str = None) -> str:
+        row = self.connection.execute("SELECT watermark FROM watermarks WHERE activity = ? AND user_id = ?", (activity or "", user_id or "")).fetchone()
+        if row: return row[0]
+        else: return None
+
+    def set_watermark(self, watermark: str, activity: str = None, user_id: str = None) -> None:
+        synced_at = datetime.datetime.utcnow().strftime(audit.DATE_FORMAT)
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO watermarks VALUES (?, ?, ?, ?)", (activity or "", user_id or "", watermark, synced_at))
+
+    def query(self, start_date: str = None, end_date: str = None, activity: str = None, user_id: str = None, limit: int = None) -> list:
+        # CreationTime is stored as the ISO string sent by the API, so bounds are compared in that format
+        clauses = []
+        params = []
+        if start_date:
+            clauses.append("creation_time >= ?")
+            params.append(start_date.replace(" ", "T"))
+        if end_date:
+            end = datetime.datetime.strptime(end_date, audit.DATE_FORMAT) + datetime.timedelta(seconds = 1)
+            clauses.append("creation_time < ?")
+            params.append(end.strftime("%Y-%m-%dT%H:%M:%S"))
+        if activity:
+            clauses.append("activity = ?")
+            params.append(activity)
+        if user_id:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+
+        sql = "SELECT data FROM events"
+        if clauses: sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY creation_time"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return [json.loads(row[0]) for row in self.connection.execute(sql, params)]
+
+    def count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def close(self) -> None:
+        self.connection.close()
+
+def sync_audit_logs(store: AuditLogStore, activity: str = None, user_id: str = None, start_date: str = None, end_date: str = None, window_hours: int = 24, workers: int = 4, overlap_minutes: int = 60, retries: int = 3, backoff: float = 1.0, client: core.Client = None) -> dict:
+    now = datetime.datetime.utcnow().replace(microsecond = 0)
+    watermark = store.get_watermark(activity, user_id)
+
+    # Power BI can publish events some time after they happened, so each run fetches the last
+    # overlap_minutes again; events already stored are ignored on insert
+    if watermark:
+        start = datetime.datetime.strptime(watermark, audit.DATE_FORMAT) + datetime.timedelta(seconds = 1) - datetime.timedelta(minutes = overlap_minutes)
+    elif start_date:
+        start = datetime.datetime.strptime(start_date, audit.DATE_FORMAT)
+    else:
+        # The activity events endpoint only keeps the last 30 days
+        start = datetime.datetime.combine((now - datetime.timedelta(days = 29)).date(), datetime.time())
+
+    if end_date: end = datetime.datetime.strptime(end_date, audit.DATE_FORMAT)
+    else: end = now
+
+    if start > end: return { "inserted": 0, "watermark": watermark, "failed": [] }
+
+    windows = audit.split_windows(start.strftime(audit.DATE_FORMAT), end.strftime(audit.DATE_FORMAT), window_hours)
+    done = {}
+    failed = []
+    inserted = 0
+    leading = 0
+
+    # Each window goes to SQLite as soon as it arrives, so at most a few windows of events are in memory
+    with concurrent.futures.ThreadPoolExecutor(max_workers = workers) as executor:
+        futures = { executor.submit(audit._fetch_window, window, activity, user_id, retries, backoff, client): window for window in windows }
+        for future in concurrent.futures.as_completed(futures):
+            window = futures.pop(future)
+            try:
+                events = future.result()
+            except Exception as error:
+                log.error("Error -- Something went wrong when trying to retrieve audit logs from {} to {}: {}".format(window[0], window[1], error))
+                events = None
+
+            if events is None: failed.append(window)
+            else: inserted += store.insert_events(events)
+            done[window] = events is not None
+
+            # Only move the watermark over windows that all succeeded, so a failed window is fetched again next time
+            advanced = False
+            while leading < len(windows) and done.get(windows[leading]):
+                watermark = windows[leading][1]
+                leading += 1
+                advanced = True
+            if advanced: store.set_watermark(watermark, activity, user_id)
+
+    failed.sort()
+    if failed: log.error("Error -- {} of {} audit log windows could not be retrieved".format(len(failed), len(windows)))
+    log.info("Synced {} new audit events up to {}".format(inserted, watermark))
+    return { "inserted": inserted, "watermark": watermark, "failed": failed }
@@ -0,0 +1,396 @@
+import datetime
+import http.server
+import json
+import math
+import random
+import socketserver
+import threading
+import time
+import uuid
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+from .transport import Transport
+
+class StandInConfig:
+    def __init__(self, workspaces: int = 10, reports: int = 5, datasets: int = 5, users: int = 5, events_per_day: int = 1000, page_size: int = 200, export_size: int = 10485760,
+                 latency: float = 0.0, throttle_rate: float = 0.0, retry_after: float = 0.1, refresh_seconds: float = 1.0, import_polls: int = 2, export_drops: int = 0, token_seconds: float = 3600, refresh_listing_delay: float = 0.0, seed: int = 0):
+        self.workspaces = workspaces
+        self.reports = reports
+        self.datasets = datasets
+        self.users = users
+        # Audit events are spread evenly over each UTC day, so any window of a day returns the same events
+        self.events_per_day = events_per_day
+        self.page_size = page_size
+        self.export_size = export_size
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.refresh_seconds = refresh_seconds
+        # A new refresh only shows in the refresh history after this many seconds, like on the service
+        self.refresh_listing_delay = refresh_listing_delay
+        self.import_polls = import_polls
+        # The first export_drops exports close the connection halfway through the body
+        self.export_drops = export_drops
+        # Lifetime of the tokens handed out by the login endpoint; API calls with an expired token get a 403
+        self.token_seconds = token_seconds
+        self.seed = seed
+
+def _guid(kind: str, *parts) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, "pbirest/{}/{}".format(kind, "/".join(str(part) for part in parts))))
+
+class _State:
+    def __init__(self, config: StandInConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.random = random.Random(config.seed)
+        self.requests = 0
+        self.throttled = 0
+        self.throttled_requests = []
+        self.logins = 0
+        # Set to an error status to make the login endpoint fail
+        self.login_status = 200
+        # API calls made with a token of one of these tenants are answered with 429
+        self.throttled_tenants = set()
+        # (status, headers) answered, in order, to the next API calls instead of the normal response
+        self.failures = []
+        self.tokens = {}
+        self.workspaces = []
+        self.reports = {}
+        self.datasets = {}
+        self.users = {}
+        self.imports = {}
+        self.uploads = []
+        self.refreshes = {}
+        self.export_version = 0
+        self.export_drops = config.export_drops
+
+        for index in range(config.workspaces):
+            workspace = { "id": _guid("workspace", index), "name": "Workspace {}".format(index), "isReadOnly": False, "isOnDedicatedCapacity": index % 2 == 0 }
+            if workspace["isOnDedicatedCapacity"]: workspace["capacityId"] = _guid("capacity", index % 4)
+            self.workspaces.append(workspace)
+            self.reports[workspace["id"]] = [{ "id": _guid("report", index, report), "name": "Report {}".format(report), "datasetId": _guid("dataset", index, report % max(1, config.datasets)), "modifiedDateTime": "2020-01-01T00:00:00Z" } for report in range(config.reports)]
+            self.datasets[workspace["id"]] = [{ "id": _guid("dataset", index, dataset), "name": "Dataset {}".format(dataset), "isRefreshable": True } for dataset in range(config.datasets)]
+            self.users[workspace["id"]] = [{ "identifier": "user{}@contoso.com".format(user), "emailAddress": "user{}@contoso.com".format(user), "groupUserAccessRight": ["Admin", "Member", "Contributor"][user % 3], "principalType": "User" } for user in range(config.users)]
+
+        self.blob = bytes(self.random.getrandbits(8) for index in range(65536))
+
+    def export_bytes(self, start: int, end: int, version: int = 0) -> bytes:
+        # The PBIX is the same 64 KiB block repeated up to export_size, shifted for each version
+        size = len(self.blob)
+        data = bytearray()
+        while start < end:
+            offset = (start + version * 4099) % size
+            chunk = self.blob[offset:min(size, offset + end - start)]
+            data += chunk
+            start += len(chunk)
+        return bytes(data)
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately: without this, small responses wait on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    @property
+    def state(self) -> _State:
+        return self.server.state
+
+    def _send_json(self, status: int, value = None, headers: dict = None) -> None:
+        body = json.dumps(value).encode("utf-8") if value is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, header in (headers or {}).items(): self.send_header(key, header)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_body(self) -> bytes:
+        # Uploads are read in chunks and dropped, so the stand-in does not hold large imports in memory
+        remaining = int(self.headers.get("Content-Length") or 0)
+        head = b""
+        self.body_size = 0
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 1048576))
+            if not chunk: break
+            if len(head) < 4096: head += chunk[:4096 - len(head)]
+            remaining -= len(chunk)
+            self.body_size += len(chunk)
+        return head
+
+    def _handle(self, method: str) -> None:
+        state = self.state
+        with state.lock:
+            state.requests += 1
+            throttle = state.config.throttle_rate and state.random.random() < state.config.throttle_rate
+            if throttle:
+                state.throttled += 1
+                state.throttled_requests.append((method, urlparse(self.path).path))
+        body = self._read_body() if method in ["POST", "PUT"] else b""
+        if state.config.latency: time.sleep(state.config.latency)
+
+        if throttle:
+            self._send_json(429, { "error": { "code": "TooManyRequests" } }, { "Retry-After": str(state.config.retry_after) })
+            return
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        segments = [unquote(segment) for segment in url.path.strip("/").split("/")]
+
+        if len(segments) >= 3 and segments[1] == "oauth2":
+            with state.lock: state.logins += 1
+            if state.login_status != 200:
+                self._send_json(state.login_status, { "error": "invalid_grant" })
+                return
+            access_token = uuid.uuid4().hex
+            with state.lock:
+                state.tokens[access_token] = (time.time() + state.config.token_seconds, segments[0])
+            self._send_json(200, { "access_token": access_token, "expires_in": str(state.config.token_seconds), "token_type": "Bearer" })
+            return
+        if segments[:2] != ["v1.0", "myorg"]:
+            self._send_json(404, { "error": { "code": "NotFound" } })
+            return
+
+        access_token = (self.headers.get("Authorization") or "").replace("Bearer ", "", 1)
+        expires_at, tenant_id = state.tokens.get(access_token, (0, None))
+        if expires_at < time.time():
+            self._send_json(403, { "error": { "code": "TokenExpired" } })
+            return
+        if tenant_id in state.throttled_tenants:
+            self._send_json(429, { "error": { "code": "TooManyRequests" } }, { "Retry-After": str(state.config.retry_after) })
+            return
+        with state.lock: failure = state.failures.pop(0) if state.failures else None
+        if failure:
+            status, headers = failure
+            self._send_json(status, { "error": { "code": "InjectedFailure" } }, headers)
+            return
+
+        route = segments[2:]
+        try:
+            handled = self._route(method, route, query, body)
+        except KeyError:
+            handled = False
+        if not handled: self._send_json(404, { "error": { "code": "NotFound" } })
+
+    def _route(self, method: str, route: list, query: dict, body: bytes) -> bool:
+        state = self.state
+
+        if route == ["groups"] and method == "GET":
+            workspaces = state.workspaces
+            if "$filter" in query:
+                field, value = query["$filter"][0].split(" eq ", 1)
+                value = value.strip("'").replace("''", "'")
+                workspaces = [workspace for workspace in workspaces if workspace.get(field.strip()) == value]
+            if "$top" in query: workspaces = workspaces[:int(query["$top"][0])]
+            self._send_json(200, { "value": workspaces })
+            return True
+        if route == ["groups"] and method == "POST":
+            workspace = { "id": str(uuid.uuid4()), "name": "New workspace", "isReadOnly": False, "isOnDedicatedCapacity": False }
+            self._send_json(200, workspace)
+            return True
+
+        if len(route) < 2 or route[0] != "groups": return self._route_admin(method, route, query)
+        workspace_id = route[1]
+        if workspace_id not in state.reports: return False
+
+        if len(route) == 2 and method == "DELETE":
+            self._send_json(200)
+            return True
+        if route[2:] == ["users"]:
+            if method == "GET": self._send_json(200, { "value": state.users[workspace_id] })
+            else: self._send_json(200)
+            return True
+        if len(route) == 4 and route[2] == "users" and method == "DELETE":
+            self._send_json(200)
+            return True
+
+        if route[2] in ["reports", "datasets"]:
+            items = state.reports[workspace_id] if route[2] == "reports" else state.datasets[workspace_id]
+            if len(route) == 3 and method == "GET":
+                self._send_json(200, { "value": items })
+                return True
+            item = next((item for item in items if item["id"] == route[3]), None)
+            if item is None: return False
+            if len(route) == 4:
+                if method == "GET": self._send_json(200, item)
+                else: self._send_json(200)
+                return True
+            if route[4:] == ["export"]: return self._export()
+            if route[4:] == ["clone"]:
+                self._send_json(200, dict(item, id = str(uuid.uuid4())))
+                return True
+            if route[4:] == ["refreshes"]: return self._refreshes(method, route[3], query)
+
+        if route[2] == "imports":
+            if len(route) == 3 and method == "POST":
+                import_id = str(uuid.uuid4())
+                with state.lock:
+                    state.imports[import_id] = 0
+                    state.uploads.append({ "bytes": self.body_size, "head": body[:64] })
+                self._send_json(202, { "id": import_id })
+                return True
+            if len(route) == 4 and method == "GET":
+                with state.lock:
+                    state.imports[route[3]] += 1
+                    polls = state.imports[route[3]]
+                self._send_json(200, { "id": route[3], "importState": "Succeeded" if polls > state.config.import_polls else "Publishing" })
+                return True
+
+        return False
+
+    def _export(self) -> bool:
+        state = self.state
+        size = state.config.export_size
+        version = state.export_version
+        start = 0
+        status = 200
+        headers = { "Accept-Ranges": "bytes", "ETag": "\"v{}\"".format(version) }
+        # A Range request with an outdated If-Range value gets the whole new version
+        if self.headers.get("Range") and self.headers.get("If-Range", headers["ETag"]) == headers["ETag"]:
+            start = int(self.headers["Range"].split("=", 1)[1].split("-", 1)[0])
+            if start >= size:
+                self._send_json(416)
+                return True
+            status = 206
+            headers["Content-Range"] = "bytes {}-{}/{}".format(start, size - 1, size)
+
+        self.send_response(status)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("Content-Length", str(size - start))
+        for key, header in headers.items(): self.send_header(key, header)
+        self.end_headers()
+
+        with state.lock:
+            drop = state.export_drops > 0
+            if drop: state.export_drops -= 1
+        stop = start + (size - start) // 2 if drop else size
+        while start < stop:
+            end = min(stop, start + 1048576)
+            self.wfile.write(state.export_bytes(start, end, version))
+            start = end
+        if drop: self.close_connection = True
+        return True
+
+    def _refreshes(self, method: str, dataset_id: str, query: dict) -> bool:
+        state = self.state
+        if method == "POST":
+            with state.lock: state.refreshes.setdefault(dataset_id, []).insert(0, time.time())
+            self._send_json(202)
+            return True
+
+        history = []
+        for started in state.refreshes.get(dataset_id, []):
+            if time.time() - started < state.config.refresh_listing_delay: continue
+            done = time.time() - started >= state.config.refresh_seconds
+            refresh = { "requestId": _guid("refresh", dataset_id, started), "refreshType": "ViaApi", "startTime": _iso(started), "status": "Completed" if done else "Unknown" }
+            if done: refresh["endTime"] = _iso(started + state.config.refresh_seconds)
+            history.append(refresh)
+        if "$top" in query: history = history[:int(query["$top"][0])]
+        self._send_json(200, { "value": history })
+        return True
+
+    def _route_admin(self, method: str, route: list, query: dict) -> bool:
+        if route != ["admin", "activityevents"] or method != "GET": return False
+
+        config = self.state.config
+        if "continuationToken" in query:
+            start, end, page = unquote(query["continuationToken"][0].strip("'")).split("|")
+            page = int(page)
+        else:
+            start, end, page = query["startDateTime"][0].strip("'"), query["endDateTime"][0].strip("'"), 0
+
+        # Event i of a day happens at i * interval seconds; the window holds the events from its start
+        # up to the second after its end, so consecutive windows share no event
+        window_start = datetime.datetime.strptime(start[:19], "%Y-%m-%dT%H:%M:%S")
+        window_end = datetime.datetime.strptime(end[:19], "%Y-%m-%dT%H:%M:%S") + datetime.timedelta(seconds = 1)
+        day = datetime.datetime.combine(window_start.date(), datetime.time())
+        interval = 86400 / max(1, config.events_per_day)
+        lowest = math.ceil((window_start - day).total_seconds() / interval)
+        highest = min(config.events_per_day, math.ceil((window_end - day).total_seconds() / interval))
+
+        first = lowest + page * config.page_size
+        last = min(highest, first + config.page_size)
+        events = []
+        for index in range(first, last):
+            created = day + datetime.timedelta(seconds = index * interval)
+            events.append({
+                "Id": _guid("event", day.date(), index), "CreationTime": created.strftime("%Y-%m-%dT%H:%M:%S"), "Operation": "ViewReport", "Activity": "ViewReport", "Workload": "PowerBI",
+                "UserId": "user{}@contoso.com".format(index % max(1, config.users)), "WorkspaceId": _guid("workspace", index % max(1, config.workspaces)),
+                "ReportId": _guid("report", index % max(1, config.workspaces), index % max(1, config.reports)), "ItemName": "Report {}".format(index % max(1, config.reports))
+            })
+
+        last_page = last >= highest
+        token = quote("{}|{}|{}".format(start, end, page + 1))
+        host = "http://{}:{}".format(*self.server.server_address[:2])
+        self._send_json(200, {
+            "activityEventEntities": events,
+            "continuationUri": None if last_page else "{}/v1.0/myorg/admin/activityevents?continuationToken='{}'".format(host, token),
+            "continuationToken": None if last_page else token,
+            "lastResultSet": last_page
+        })
+        return True
+
+    def do_GET(self) -> None:
+        self._handle("GET")
+
+    def do_POST(self) -> None:
+        self._handle("POST")
+
+    def do_PUT(self) -> None:
+        self._handle("PUT")
+
+    def do_DELETE(self) -> None:
+        self._handle("DELETE")
+
+def _iso(timestamp: float) -> str:
+    return datetime.datetime.utcfromtimestamp(timestamp).strftime("%Y-%m-%dT%H:%M:%S.%f")[:23] + "Z"
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class StandInServer:
+    def __init__(self, config: StandInConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or StandInConfig()
+        self.server = _Server((host, port), _Handler)
+        self.server.state = _State(self.config)
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return "http://{}:{}".format(*self.server.server_address[:2])
+
+    @property
+    def api_url(self) -> str:
+        return "{}/v1.0/myorg".format(self.url)
+
+    @property
+    def stats(self) -> dict:
+        return { "requests": self.server.state.requests, "throttled": self.server.state.throttled, "logins": self.server.state.logins }
+
+    @property
+    def state(self) -> _State:
+        return self.server.state
+
+    def publish_new_reports(self) -> None:
+        # Every report is exported with new content and a new ETag from now on
+        with self.state.lock: self.state.export_version += 1
+
+    def transport(self, **kwargs) -> Transport:
+        return Transport(api_url = self.api_url, login_url = self.url, **kwargs)
+
+    def start(self) -> "StandInServer":
+        self.thread = threading.Thread(target = self.server.serve_forever, kwargs = { "poll_interval": 0.05 }, name = "pbirest-stand-in", daemon = True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "StandInServer":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
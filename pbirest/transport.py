@@ -0,0 +1,132 @@
+import os
+import requests
+import threading
+import time
+import uuid
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+from .ratelimit import RateLimiter
+
+API_URL = "https://api.powerbi.com/v1.0/myorg"
+LOGIN_URL = "https://login.microsoftonline.com"
+# Matches the default max_concurrency of pbirest.aio, so a default fan-out keeps all its connections alive
+DEFAULT_POOL_MAXSIZE = 32
+# Seconds to wait for a connection and between two reads, so a half-open connection cannot hang a call
+DEFAULT_TIMEOUT = (10, 120)
+
+class Transport:
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = DEFAULT_POOL_MAXSIZE, pool_block: bool = False, keep_alive: bool = True, max_retries: int = 0, api_url: str = API_URL, login_url: str = LOGIN_URL, session: requests.Session = None, rate_limiter: RateLimiter = None, timeout = DEFAULT_TIMEOUT):
+        self.api_url = api_url.rstrip("/")
+        self.login_url = login_url.rstrip("/")
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        self.timeout = timeout
+
+        if session:
+            self.session = session
+        else:
+            # pool_connections is the number of hosts kept in the pool, pool_maxsize the number of
+            # connections kept alive per host. pool_block turns pool_maxsize into a hard per-host limit.
+            adapter = HTTPAdapter(pool_connections = pool_connections, pool_maxsize = pool_maxsize, pool_block = pool_block, max_retries = max_retries)
+            self.session = requests.Session()
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+            if not keep_alive: self.session.headers["Connection"] = "close"
+
+    def url(self, path: str) -> str:
+        if path.startswith("http://") or path.startswith("https://"): return path
+        return "{}/{}".format(self.api_url, path.lstrip("/"))
+
+    def request(self, method: str, path: str, rate_limiter: RateLimiter = None, **kwargs) -> requests.Response:
+        url = self.url(path)
+        return (rate_limiter or self.rate_limiter).send(method, url, lambda: self._send(method, url, kwargs), kwargs.get("data"))
+
+    def _send(self, method: str, url: str, kwargs: dict) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        recorder = metrics.active
+        if recorder is None: return self.session.request(method, url, **kwargs)
+
+        started = time.perf_counter()
+        response = self.session.request(method, url, **kwargs)
+        seconds = time.perf_counter() - started
+
+        # Streamed bodies are not read here, their size comes from the headers
+        bytes_sent = int(response.request.headers.get("Content-Length") or 0)
+        if kwargs.get("stream"): bytes_received = int(response.headers.get("Content-Length") or 0)
+        else: bytes_received = len(response.content)
+        recorder.record_request(method, url, response.status_code, seconds, bytes_sent, bytes_received)
+        return response
+
+    def close(self) -> None:
+        self.session.close()
+
+class MultipartFile:
+    # File-like multipart/form-data body with a single file field. It reads the file from disk
+    # as it is sent and knows its length up front, so requests sends a Content-Length header.
+    def __init__(self, path: str, field: str = "file", chunk_size: int = 1048576):
+        self.boundary = uuid.uuid4().hex
+        self.chunk_size = chunk_size
+        self.head = "--{}\r\nContent-Disposition: form-data; name=\"{}\"; filename=\"{}\"\r\nContent-Type: application/octet-stream\r\n\r\n".format(self.boundary, field, os.path.basename(path)).encode("utf-8")
+        self.tail = "\r\n--{}--\r\n".format(self.boundary).encode("utf-8")
+        self.length = len(self.head) + os.path.getsize(path) + len(self.tail)
+        self.file = open(path, "rb")
+        self.parts = [self.head, None, self.tail]
+
+    @property
+    def content_type(self) -> str:
+        return "multipart/form-data; boundary={}".format(self.boundary)
+
+    def __len__(self) -> int:
+        return self.length
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0: size = self.chunk_size
+        while self.parts:
+            if self.parts[0] is None:
+                chunk = self.file.read(size)
+                if chunk: return chunk
+                self.parts.pop(0)
+            else:
+                chunk, rest = self.parts[0][:size], self.parts[0][size:]
+                if rest: self.parts[0] = rest
+                else: self.parts.pop(0)
+                return chunk
+        return b""
+
+    def rewind(self) -> None:
+        self.file.seek(0)
+        self.parts = [self.head, None, self.tail]
+
+    def close(self) -> None:
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+_default = None
+_default_lock = threading.Lock()
+
+def get_transport() -> Transport:
+    global _default
+    if _default is None:
+        with _default_lock:
+            if _default is None: _default = Transport()
+    return _default
+
+def set_transport(transport: Transport) -> None:
+    global _default
+    with _default_lock:
+        previous = _default
+        _default = transport
+    if previous is not None and previous is not transport: previous.close()
+
+def configure_transport(pool_connections: int = 10, pool_maxsize: int = DEFAULT_POOL_MAXSIZE, pool_block: bool = False, keep_alive: bool = True, max_retries: int = 0, api_url: str = API_URL, login_url: str = LOGIN_URL, session: requests.Session = None, rate_limiter: RateLimiter = None, timeout = DEFAULT_TIMEOUT) -> Transport:
+    transport = Transport(pool_connections, pool_maxsize, pool_block, keep_alive, max_retries, api_url, login_url, session, rate_limiter, timeout)
+    set_transport(transport)
+    return transport
+
+def request(method: str, path: str, **kwargs) -> requests.Response:
+    return get_transport().request(method, path, **kwargs)
@@ -11,6 +11,7 @@ setuptools.setup(
     author_email = "antoinedewilde7@gmail.com",
     url = "https://github.com/AntoineDW/powerbi-rest-api-python",
     keywords = ["power bi", "powerbi", "rest", "api", "rest api"],
+    python_requires = ">=3.6",
     install_requires = [
         "requests"
     ],
@@ -20,8 +21,8 @@ setuptools.setup(
         "Topic :: Software Development :: Libraries :: Python Modules",
         "License :: OSI Approved :: MIT License",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.4",
-        "Programming Language :: Python :: 3.5",
-        "Programming Language :: Python :: 3.6"
+        "Programming Language :: Python :: 3.6",
+        "Programming Language :: Python :: 3.7",
+        "Programming Language :: Python :: 3.8"
     ]
 )
\ No newline at end of file
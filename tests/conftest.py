@@ -0,0 +1,19 @@
+import pytest
+
+import pbirest
+from pbirest.testing import StandInConfig, StandInServer
+
+@pytest.fixture
+def stand_in():
+    # Starts a stand-in server with the given configuration and returns it with a client connected to it
+    servers = []
+
+    def start(**config):
+        server = StandInServer(StandInConfig(**config)).start()
+        servers.append(server)
+        client = pbirest.Client(server.transport())
+        client.connect("client", "test@contoso.com", "password")
+        return server, client
+
+    yield start
+    for server in servers: server.stop()
@@ -0,0 +1,50 @@
+import time
+
+import requests
+
+import pbirest
+from pbirest.testing import StandInConfig, StandInServer
+
+def test_hourly_backfill_fetches_every_window(stand_in):
+    server, client = stand_in(events_per_day = 24 * 3, page_size = 2)
+
+    result = pbirest.backfill_audit_logs("2024-01-01 00:00:00", "2024-01-01 23:59:59", window_hours = 1, backoff = 0, client = client)
+
+    assert result["failed"] == []
+    assert len(result["events"]) == 24 * 3
+    hours = sorted(set(event["CreationTime"][11:13] for event in result["events"]))
+    assert hours == ["{:02d}".format(hour) for hour in range(24)]
+
+def test_backfill_keeps_connection_errors_to_their_window(stand_in):
+    server, client = stand_in(events_per_day = 2)
+    iter_audit_logs = client.iter_audit_logs
+    attempts = []
+
+    def flaky(start_date, end_date, *args, **kwargs):
+        if start_date.startswith("2024-01-02"):
+            attempts.append(start_date)
+            raise requests.ConnectionError("connection reset")
+        return iter_audit_logs(start_date, end_date, *args, **kwargs)
+
+    client.iter_audit_logs = flaky
+    result = pbirest.backfill_audit_logs("2024-01-01 00:00:00", "2024-01-03 23:59:59", retries = 2, backoff = 0, client = client)
+
+    assert result["failed"] == [("2024-01-02 00:00:00", "2024-01-02 23:59:59")]
+    assert len(result["events"]) == 4
+    assert len(attempts) == 3
+
+def test_audit_log_pages_use_the_token_current_when_they_are_fetched():
+    with StandInServer(StandInConfig(events_per_day = 24 * 10, page_size = 5, token_seconds = 1)) as server:
+        client = pbirest.Client(server.transport(), refresh_margin = 0, background = False)
+        client.connect("client", "test@contoso.com", "password")
+        # Only the first token is short-lived
+        server.config.token_seconds = 3600
+
+        pages = client.iter_audit_logs("2024-01-01 00:00:00", "2024-01-01 00:59:59", pages = True)
+        first = next(pages)
+        # The consumer pauses until the token has expired
+        time.sleep(1.2)
+        rest = [event for page in pages for event in page]
+
+        assert len(first) + len(rest) == 10
+        assert server.stats["logins"] == 2
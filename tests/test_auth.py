@@ -0,0 +1,59 @@
+import concurrent.futures
+import os
+import stat
+import time
+
+import pbirest
+from pbirest.testing import StandInConfig, StandInServer
+
+def _client(server, cache_file = None, **kwargs):
+    client = pbirest.Client(server.transport(), **kwargs)
+    client.connect("client", "test@contoso.com", "password", cache_file = cache_file)
+    return client
+
+def test_an_expired_token_is_renewed_once_for_concurrent_calls():
+    metrics = pbirest.enable_metrics()
+    try:
+        with StandInServer(StandInConfig(workspaces = 2, token_seconds = 1)) as server:
+            client = _client(server, refresh_margin = 0, background = False)
+            server.config.token_seconds = 3600
+            time.sleep(1.2)
+
+            with concurrent.futures.ThreadPoolExecutor(max_workers = 16) as executor:
+                results = list(executor.map(lambda index: client.get_workspaces(), range(32)))
+
+            assert all(len(result) == 2 for result in results)
+            assert server.stats["logins"] == 2
+            assert metrics.snapshot()["token_refreshes"] == { "success": 2 }
+    finally:
+        pbirest.disable_metrics()
+
+def test_a_failed_early_refresh_is_not_retried_on_every_call():
+    metrics = pbirest.enable_metrics()
+    try:
+        with StandInServer(StandInConfig(workspaces = 2, token_seconds = 100)) as server:
+            # With 100s left and a 300s margin, every call is inside the refresh margin
+            client = _client(server, refresh_margin = 300, background = False)
+            server.state.login_status = 500
+
+            for index in range(50):
+                assert len(client.get_workspaces()) == 2
+                time.sleep(0.002)
+            time.sleep(0.1)
+
+            assert server.stats["logins"] == 2
+            assert metrics.snapshot()["token_refreshes"] == { "success": 1, "failure": 1 }
+    finally:
+        pbirest.disable_metrics()
+
+def test_the_token_cache_file_skips_the_login_and_is_private(tmp_path):
+    cache_file = str(tmp_path / "token.json")
+    with StandInServer(StandInConfig(workspaces = 1)) as server:
+        first = _client(server, cache_file = cache_file)
+        second = _client(server, cache_file = cache_file)
+
+        assert server.stats["logins"] == 1
+        assert second.get_token()["bearer"] == first.get_token()["bearer"]
+        assert len(second.get_workspaces()) == 1
+        assert stat.S_IMODE(os.stat(cache_file).st_mode) == 0o600
+        with open(cache_file, "r") as file: assert "password" not in file.read()
@@ -0,0 +1,56 @@
+import os
+
+import requests
+
+import pbirest
+from pbirest.backup import load_manifest
+
+def test_backup_skips_unchanged_reports(stand_in, tmp_path):
+    server, client = stand_in(workspaces = 2, reports = 2, export_size = 50000)
+    directory = str(tmp_path)
+
+    first = pbirest.backup_workspaces(directory, client = client)
+    assert sum(first["totals"].values()) == 4
+    assert first["totals"].get("failed") is None
+    assert first["bytes_transferred"] == 4 * 50000
+
+    second = pbirest.backup_workspaces(directory, client = client)
+    assert second["totals"] == { "unchanged": 4 }
+    assert second["bytes_transferred"] == 0
+    for entry in second["reports"]:
+        assert os.path.exists(pbirest.restore_path(directory, entry["workspace_id"], entry["report_id"]))
+
+def test_backup_keeps_previous_entries_when_exports_and_listings_fail(stand_in, tmp_path):
+    server, client = stand_in(workspaces = 2, reports = 2, export_size = 50000)
+    directory = str(tmp_path)
+    pbirest.backup_workspaces(directory, client = client)
+    before = { (entry["workspace_id"], entry["report_id"]): entry["sha256"] for entry in load_manifest(directory)["reports"] }
+
+    workspace_ids = [workspace["id"] for workspace in client.get_workspaces()]
+    for report in server.state.reports[workspace_ids[0]]: report["modifiedDateTime"] = "2021-01-01T00:00:00Z"
+    get_reports = client.get_reports
+
+    def unlisted(workspace_id):
+        if workspace_id == workspace_ids[1]: raise requests.ConnectionError("connection reset")
+        return get_reports(workspace_id)
+
+    def unexported(*args, **kwargs):
+        raise requests.ConnectionError("connection reset")
+
+    client.get_reports = unlisted
+    client.export_report = unexported
+    manifest = pbirest.backup_workspaces(directory, client = client)
+
+    assert manifest["totals"] == { "failed": 2, "kept": 2 }
+    assert manifest["errors"] == [{ "workspace_id": workspace_ids[1] }]
+    after = { (entry["workspace_id"], entry["report_id"]): entry["sha256"] for entry in load_manifest(directory)["reports"] }
+    assert after == before
+    for workspace_id, report_id in after:
+        assert os.path.exists(pbirest.restore_path(directory, workspace_id, report_id))
+
+    # The failed reports are exported again on the next run; their content did not change
+    del client.get_reports
+    del client.export_report
+    retried = pbirest.backup_workspaces(directory, client = client)
+    assert retried["totals"] == { "unchanged": 4 }
+    assert retried["bytes_transferred"] == 2 * 50000
@@ -0,0 +1,74 @@
+from pbirest.cache import MetadataCache
+
+def test_listings_are_copied_in_and_out_of_the_cache():
+    cache = MetadataCache()
+    items = [{ "id": "1", "name": "Sales" }, { "id": "2", "name": "Finance" }]
+
+    returned = cache.set(("workspaces",), items)
+    items.clear()
+    returned.sort(key = lambda item: item["name"])
+    returned.pop()
+    cache.get(("workspaces",)).clear()
+
+    assert cache.get(("workspaces",)) == [{ "id": "1", "name": "Sales" }, { "id": "2", "name": "Finance" }]
+    assert cache.find(("workspaces",), "id", "2") == { "id": "2", "name": "Finance" }
+    assert cache.find(("workspaces",), "name", "Sales") == { "id": "1", "name": "Sales" }
+
+def test_changing_a_returned_listing_leaves_the_client_cache_intact(stand_in):
+    server, client = stand_in(workspaces = 3)
+    client.enable_cache()
+
+    workspaces = client.get_workspaces()
+    workspaces.clear()
+    requests = server.stats["requests"]
+
+    assert len(client.get_workspaces()) == 3
+    assert client.get_workspace(server.state.workspaces[1]["id"]) == server.state.workspaces[1]
+    assert server.stats["requests"] == requests
+
+def test_invalidate_drops_entries_by_prefix():
+    cache = MetadataCache()
+    cache.set(("reports", "ws1"), [{ "id": "r1", "name": "Sales" }])
+    cache.set(("report", "ws1", "r1"), { "id": "r1", "name": "Sales" })
+    cache.set(("report", "ws2", "r2"), { "id": "r2", "name": "Finance" })
+    cache.set(("datasets", "ws1"), [{ "id": "d1", "name": "Sales" }])
+
+    cache.invalidate(("reports", "ws1"), ("report", "ws1"))
+
+    assert cache.get(("reports", "ws1")) is None
+    assert cache.get(("report", "ws1", "r1")) is None
+    assert cache.get(("report", "ws2", "r2")) == { "id": "r2", "name": "Finance" }
+    assert cache.get(("datasets", "ws1")) == [{ "id": "d1", "name": "Sales" }]
+
+def test_ttl_and_max_entries_evict_entries():
+    cache = MetadataCache(ttl = { "report": 0 }, max_entries = 2)
+    cache.set(("report", "ws1", "r1"), { "id": "r1" })
+    assert cache.get(("report", "ws1", "r1")) is None
+
+    cache.set(("dataset", "ws1", "d1"), { "id": "d1" })
+    cache.set(("dataset", "ws1", "d2"), { "id": "d2" })
+    cache.get(("dataset", "ws1", "d1"))
+    cache.set(("dataset", "ws1", "d3"), { "id": "d3" })
+    assert cache.get(("dataset", "ws1", "d2")) is None
+    assert cache.get(("dataset", "ws1", "d1")) == { "id": "d1" }
+
+def test_client_calls_invalidate_what_they_change(stand_in, tmp_path):
+    server, client = stand_in(workspaces = 1, reports = 2, datasets = 2)
+    client.enable_cache()
+    workspace_id = client.get_workspaces()[0]["id"]
+    report_id = client.get_reports(workspace_id)[0]["id"]
+    dataset_id = client.get_datasets(workspace_id)[0]["id"]
+    cache = client.cache
+    cache.set(("report", workspace_id, report_id), { "id": report_id })
+    cache.set(("dataset", workspace_id, dataset_id), { "id": dataset_id })
+
+    in_file = str(tmp_path / "report.pbix")
+    with open(in_file, "wb") as file: file.write(b"pbix")
+    client.import_report(workspace_id, "Report 0", in_file)
+
+    for key in [("reports", workspace_id), ("datasets", workspace_id), ("report", workspace_id, report_id), ("dataset", workspace_id, dataset_id)]:
+        assert cache.get(key) is None
+    assert cache.get(("workspaces",)) is not None
+
+    client.delete_workspace(workspace_id)
+    assert cache.get(("workspaces",)) is None
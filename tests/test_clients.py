@@ -0,0 +1,39 @@
+import concurrent.futures
+import time
+
+import pbirest
+from pbirest.testing import StandInConfig, StandInServer
+
+def test_a_throttled_tenant_does_not_pause_other_clients():
+    with StandInServer(StandInConfig(workspaces = 2, retry_after = 1.0)) as server:
+        transport = server.transport(rate_limiter = pbirest.RateLimiter(retries = 1))
+        contoso = pbirest.Client(transport)
+        contoso.connect("client", "test@contoso.com", "password", tenant_id = "contoso")
+        fabrikam = pbirest.Client(transport)
+        fabrikam.connect("client", "test@fabrikam.com", "password", tenant_id = "fabrikam")
+        server.state.throttled_tenants.add("contoso")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers = 1) as executor:
+            throttled = executor.submit(contoso.get_workspaces)
+            time.sleep(0.2)
+
+            started = time.monotonic()
+            assert len(fabrikam.get_workspaces()) == 2
+            assert time.monotonic() - started < 0.5
+            assert throttled.result() is None
+
+def test_clients_follow_the_rate_limiter_of_their_transport():
+    with StandInServer(StandInConfig(workspaces = 1)) as server:
+        transport = server.transport(rate_limiter = pbirest.RateLimiter({ "groups": (5, 1) }, retries = 2))
+        client = pbirest.Client(transport)
+        own = client.get_rate_limiter()
+
+        assert own is not transport.rate_limiter
+        assert own.limits == { "groups": (5, 1) } and own.retries == 2
+        assert client.get_rate_limiter() is own
+
+        transport.rate_limiter = pbirest.RateLimiter(retries = 7)
+        assert client.get_rate_limiter().retries == 7
+
+        shared = pbirest.RateLimiter()
+        assert pbirest.Client(transport, rate_limiter = shared).get_rate_limiter() is shared
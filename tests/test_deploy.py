@@ -0,0 +1,53 @@
+import threading
+import time
+
+import pbirest
+
+def test_deployments_are_scheduled_by_capacity(stand_in):
+    server, client = stand_in(workspaces = 12, reports = 1)
+    source = server.state.workspaces[0]["id"]
+    report_id = server.state.reports[source][0]["id"]
+    targets = [workspace["id"] for workspace in server.state.workspaces]
+    # Targets grouped by capacity, the busy capacity first
+    capacities = { workspace_id: "busy" if index < 8 else "idle" for index, workspace_id in enumerate(targets) }
+
+    lock = threading.Lock()
+    running = { "busy": 0, "idle": 0 }
+    peaks = { "busy": 0, "idle": 0 }
+    starts = {}
+    clone_report = client.clone_report
+
+    def slow_clone(workspace_id, report_id, name, target):
+        capacity_id = capacities[target]
+        with lock:
+            starts[target] = time.monotonic()
+            running[capacity_id] += 1
+            peaks[capacity_id] = max(peaks[capacity_id], running[capacity_id])
+        time.sleep(0.1)
+        with lock: running[capacity_id] -= 1
+        return clone_report(workspace_id, report_id, name, target)
+
+    client.clone_report = slow_clone
+    started = time.monotonic()
+    results = pbirest.deploy_clone(source, report_id, "Copy", targets, workers = 4, default_capacity_limit = 2, capacities = capacities, client = client)
+
+    assert [result["workspace_id"] for result in results] == targets
+    assert all(result["status"] == "Succeeded" for result in results)
+    assert peaks == { "busy": 2, "idle": 2 }
+    # The idle capacity starts right away instead of waiting behind the busy one
+    idle = sorted(starts[workspace_id] - started for workspace_id in targets[8:])
+    assert idle[1] < 0.05
+
+def test_shared_capacity_targets_are_not_limited(stand_in):
+    server, client = stand_in(workspaces = 6, reports = 1)
+    source = server.state.workspaces[0]["id"]
+    report_id = server.state.reports[source][0]["id"]
+    targets = [workspace["id"] for workspace in server.state.workspaces]
+
+    started = time.monotonic()
+    clone_report = client.clone_report
+    client.clone_report = lambda *args: time.sleep(0.1) or clone_report(*args)
+    results = pbirest.deploy_clone(source, report_id, "Copy", targets, workers = 6, default_capacity_limit = 1, capacities = {}, client = client)
+
+    assert all(result["status"] == "Succeeded" for result in results)
+    assert time.monotonic() - started < 0.3
@@ -0,0 +1,72 @@
+import hashlib
+import time
+
+import pbirest
+from pbirest.testing import StandInConfig, StandInServer
+
+def _report(client):
+    workspace_id = client.get_workspaces()[0]["id"]
+    return workspace_id, client.get_reports(workspace_id)[0]["id"]
+
+def test_export_resumes_a_dropped_transfer_within_the_call(stand_in, tmp_path):
+    server, client = stand_in(workspaces = 1, reports = 1, export_size = 300000, export_drops = 2)
+    workspace_id, report_id = _report(client)
+    out_file = str(tmp_path / "report.pbix")
+
+    result = client.export_report(workspace_id, report_id, out_file, chunk_size = 16384, checksum = "sha256")
+
+    expected = server.state.export_bytes(0, 300000)
+    assert result["response"] == 206
+    assert result["bytes"] == 300000
+    assert result["sha256"] == hashlib.sha256(expected).hexdigest()
+    with open(out_file, "rb") as file: assert file.read() == expected
+
+def test_export_resumes_a_previous_call_of_the_same_version(stand_in, tmp_path):
+    server, client = stand_in(workspaces = 1, reports = 1, export_size = 300000, export_drops = 1)
+    workspace_id, report_id = _report(client)
+    out_file = str(tmp_path / "report.pbix")
+
+    assert client.export_report(workspace_id, report_id, out_file, chunk_size = 16384, resume = True, retries = 0) is None
+    assert 0 < (tmp_path / "report.pbix.part").stat().st_size < 300000
+
+    result = client.export_report(workspace_id, report_id, out_file, resume = True)
+    with open(out_file, "rb") as file: assert file.read() == server.state.export_bytes(0, 300000)
+    assert result["response"] == 206
+    assert not (tmp_path / "report.pbix.part.validator").exists()
+
+def test_export_restarts_when_the_report_changed_since_the_previous_call(stand_in, tmp_path):
+    server, client = stand_in(workspaces = 1, reports = 1, export_size = 300000, export_drops = 1)
+    workspace_id, report_id = _report(client)
+    out_file = str(tmp_path / "report.pbix")
+
+    assert client.export_report(workspace_id, report_id, out_file, chunk_size = 16384, resume = True, retries = 0) is None
+    server.publish_new_reports()
+
+    result = client.export_report(workspace_id, report_id, out_file, resume = True)
+    assert result["response"] == 200
+    with open(out_file, "rb") as file: assert file.read() == server.state.export_bytes(0, 300000, version = 1)
+
+def test_export_ignores_leftovers_unless_asked_to_resume(stand_in, tmp_path):
+    server, client = stand_in(workspaces = 1, reports = 1, export_size = 300000)
+    workspace_id, report_id = _report(client)
+    out_file = str(tmp_path / "report.pbix")
+    (tmp_path / "report.pbix.part").write_bytes(b"stale" * 1000)
+
+    client.export_report(workspace_id, report_id, out_file)
+    with open(out_file, "rb") as file: assert file.read() == server.state.export_bytes(0, 300000)
+
+def test_export_retries_with_the_token_current_when_they_are_sent(tmp_path):
+    with StandInServer(StandInConfig(workspaces = 1, reports = 1, export_size = 300000, export_drops = 1, token_seconds = 1)) as server:
+        client = pbirest.Client(server.transport(), refresh_margin = 0, background = False)
+        client.connect("client", "test@contoso.com", "password")
+        # Only the first token is short-lived
+        server.config.token_seconds = 3600
+        workspace_id, report_id = _report(client)
+        out_file = str(tmp_path / "report.pbix")
+
+        # The first chunk arrives just before the token expires, the dropped transfer is resumed after
+        result = client.export_report(workspace_id, report_id, out_file, chunk_size = 16384, progress = lambda done, total: time.sleep(1.2) if done == 16384 else None)
+
+        assert result["response"] == 206
+        assert server.stats["logins"] == 2
+        with open(out_file, "rb") as file: assert file.read() == server.state.export_bytes(0, 300000)
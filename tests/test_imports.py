@@ -0,0 +1,24 @@
+import os
+
+import pbirest
+from pbirest.testing import StandInConfig, StandInServer
+
+def test_throttled_imports_are_sent_again_in_full(tmp_path):
+    in_file = str(tmp_path / "report.pbix")
+    with open(in_file, "wb") as file: file.write(os.urandom(200000))
+
+    with StandInServer(StandInConfig(workspaces = 1, throttle_rate = 0.5, retry_after = 0.01, import_polls = 1, seed = 3)) as server:
+        client = pbirest.Client(server.transport(rate_limiter = pbirest.RateLimiter(retries = 20, backoff = 0.01)))
+        client.connect("client", "test@contoso.com", "password")
+        workspace_id = client.get_workspaces()[0]["id"]
+
+        results = [client.import_report(workspace_id, "Report {}".format(index), in_file, chunk_size = 16384) for index in range(5)]
+        statuses = [pbirest.wait_for_import(workspace_id, result["id"], initial_delay = 0.01, max_delay = 0.01, client = client) for result in results]
+
+        assert any(method == "POST" and path.endswith("/imports") for method, path in server.state.throttled_requests)
+        assert [status["importState"] for status in statuses] == ["Succeeded"] * 5
+        # Each upload reached the stand-in whole, the multipart body was rewound before every retry
+        assert len(server.state.uploads) == 5
+        for upload in server.state.uploads:
+            assert upload["head"].startswith(b"--")
+            assert upload["bytes"] > 200000
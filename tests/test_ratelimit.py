@@ -0,0 +1,109 @@
+import email.utils
+import threading
+import time
+
+import pbirest
+from pbirest.ratelimit import TokenBucket, parse_retry_after
+from pbirest.testing import StandInConfig, StandInServer
+
+def _client(server: StandInServer, **limiter) -> pbirest.Client:
+    client = pbirest.Client(server.transport(rate_limiter = pbirest.RateLimiter(**dict({ "retries": 3, "backoff": 0.01 }, **limiter))))
+    client.connect("client", "test@contoso.com", "password")
+    return client
+
+def _timed(call):
+    started = time.monotonic()
+    result = call()
+    return result, time.monotonic() - started
+
+def test_idempotent_calls_are_retried_on_server_errors():
+    with StandInServer(StandInConfig(workspaces = 1, reports = 1)) as server:
+        client = _client(server)
+        workspace_id = client.get_workspaces()[0]["id"]
+        report_id = client.get_reports(workspace_id)[0]["id"]
+
+        calls = [
+            lambda: client.get_users_in_workspace(workspace_id),
+            lambda: client.update_user_in_workspace(workspace_id, "user0@contoso.com", "Admin"),
+            lambda: client.delete_report(workspace_id, report_id)
+        ]
+        for call in calls:
+            server.state.failures = [(503, {}), (502, {})]
+            before = server.state.requests
+            assert call() is not None
+            assert server.state.requests - before == 3
+            assert server.state.failures == []
+
+def test_posts_are_not_retried_on_server_errors():
+    with StandInServer(StandInConfig(workspaces = 1)) as server:
+        client = _client(server)
+        server.state.failures = [(503, {})]
+        before = server.state.requests
+
+        assert client.create_workspace("Sales") is None
+        assert server.state.requests - before == 1
+        # Once the failure is gone the same call goes through
+        assert client.create_workspace("Sales") is not None
+
+def test_retry_after_seconds_are_honoured():
+    assert parse_retry_after("2.5") == 2.5
+    assert parse_retry_after("-1") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+    with StandInServer(StandInConfig(workspaces = 1)) as server:
+        client = _client(server)
+        server.state.failures = [(503, { "Retry-After": "0.4" })]
+        workspaces, elapsed = _timed(client.get_workspaces)
+
+        assert len(workspaces) == 1
+        assert elapsed >= 0.4
+
+def test_retry_after_dates_are_honoured():
+    retry_after = parse_retry_after(email.utils.formatdate(time.time() + 30, usegmt = True))
+    assert 28 < retry_after <= 30
+    assert parse_retry_after(email.utils.formatdate(time.time() - 30, usegmt = True)) == 0.0
+
+    with StandInServer(StandInConfig(workspaces = 1)) as server:
+        client = _client(server)
+        # HTTP dates have a one second resolution, so the wait is between one and two seconds
+        server.state.failures = [(429, { "Retry-After": email.utils.formatdate(time.time() + 2, usegmt = True) })]
+        workspaces, elapsed = _timed(client.get_workspaces)
+
+        assert len(workspaces) == 1
+        assert 0.9 <= elapsed < 3
+
+def test_throttling_pauses_the_whole_endpoint_family():
+    with StandInServer(StandInConfig(workspaces = 1, events_per_day = 10)) as server:
+        client = _client(server)
+        workspace_id = client.get_workspaces()[0]["id"]
+        server.state.failures = [(429, { "Retry-After": "0.6" })]
+
+        throttled = threading.Thread(target = client.get_workspaces)
+        throttled.start()
+        time.sleep(0.1)
+        assert server.state.failures == []
+
+        # Another groups call waits for the end of the pause, the admin endpoints are not paused
+        events, admin_elapsed = _timed(lambda: client.get_audit_logs("2020-01-01 00:00:00", "2020-01-01 23:59:59"))
+        reports, groups_elapsed = _timed(lambda: client.get_reports(workspace_id))
+        throttled.join()
+
+        assert events and reports
+        assert admin_elapsed < 0.3
+        assert groups_elapsed >= 0.2
+
+def test_token_buckets_pace_each_family():
+    bucket = TokenBucket(rate = 20, capacity = 2)
+    waited = [bucket.acquire() for index in range(6)]
+    assert waited[:2] == [0.0, 0.0]
+    assert sum(waited) >= 0.15
+
+    with StandInServer(StandInConfig(workspaces = 1, events_per_day = 10)) as server:
+        client = _client(server, limits = { "groups": (20, 1) })
+        _, groups_elapsed = _timed(lambda: [client.get_workspaces() for index in range(11)])
+        _, admin_elapsed = _timed(lambda: [client.get_audit_logs("2020-01-01 00:00:00", "2020-01-01 23:59:59") for index in range(11)])
+
+        # Ten calls past the first one at 20 per second take at least half a second
+        assert groups_elapsed >= 0.45
+        assert admin_elapsed < groups_elapsed
@@ -0,0 +1,85 @@
+import time
+
+import requests
+
+import pbirest
+
+def _datasets(server, workspace_index = 0):
+    workspace_id = server.state.workspaces[workspace_index]["id"]
+    return workspace_id, [dataset["id"] for dataset in server.state.datasets[workspace_id]]
+
+def test_dependencies_refresh_after_the_datasets_they_depend_on(stand_in):
+    server, client = stand_in(workspaces = 1, datasets = 3, refresh_seconds = 0.2)
+    workspace_id, dataset_ids = _datasets(server)
+    staging, sales, finance = [(workspace_id, dataset_id) for dataset_id in dataset_ids]
+
+    results = pbirest.refresh_datasets([finance, sales, staging], dependencies = { sales: [staging], finance: [sales] }, capacities = {}, initial_delay = 0.05, max_delay = 0.1, client = client)
+
+    assert [result["status"] for result in results] == ["Completed"] * 3
+    started = { dataset_id: server.state.refreshes[dataset_id][0] for dataset_id in dataset_ids }
+    assert started[dataset_ids[1]] - started[dataset_ids[0]] >= 0.2
+    assert started[dataset_ids[2]] - started[dataset_ids[1]] >= 0.2
+
+def test_each_capacity_keeps_to_its_limit(stand_in):
+    server, client = stand_in(workspaces = 2, datasets = 3, refresh_seconds = 0.2)
+    busy, busy_ids = _datasets(server, 0)
+    free, free_ids = _datasets(server, 1)
+    datasets = [(busy, dataset_id) for dataset_id in busy_ids] + [(free, dataset_id) for dataset_id in free_ids]
+
+    results = pbirest.refresh_datasets(datasets, capacity_limits = { "busy": 1 }, capacities = { busy: "busy", free: None }, initial_delay = 0.05, max_delay = 0.1, client = client)
+
+    assert all(result["status"] == "Completed" for result in results)
+    busy_starts = sorted(server.state.refreshes[dataset_id][0] for dataset_id in busy_ids)
+    assert all(later - earlier >= 0.2 for earlier, later in zip(busy_starts, busy_starts[1:]))
+    free_starts = sorted(server.state.refreshes[dataset_id][0] for dataset_id in free_ids)
+    assert free_starts[-1] - free_starts[0] < 0.1
+
+def test_a_failed_trigger_skips_its_dependents(stand_in):
+    server, client = stand_in(workspaces = 1, datasets = 3, refresh_seconds = 0.1)
+    workspace_id, dataset_ids = _datasets(server)
+    staging, sales, other = [(workspace_id, dataset_id) for dataset_id in dataset_ids]
+    refresh_dataset = client.refresh_dataset
+
+    def failing(workspace_id, dataset_id, notify_option):
+        if dataset_id == staging[1]: raise requests.ConnectionError("connection reset")
+        return refresh_dataset(workspace_id, dataset_id, notify_option)
+
+    client.refresh_dataset = failing
+    results = pbirest.refresh_datasets([staging, sales, other], dependencies = { sales: [staging] }, capacities = {}, initial_delay = 0.05, max_delay = 0.1, client = client)
+
+    assert [result["status"] for result in results] == ["Failed", "Skipped", "Completed"]
+    assert sales[1] not in server.state.refreshes
+
+def test_a_missing_history_is_fetched_again_before_the_trigger(stand_in):
+    server, client = stand_in(workspaces = 1, datasets = 1, refresh_seconds = 0.4, refresh_listing_delay = 0.2)
+    workspace_id, dataset_ids = _datasets(server)
+    dataset = (workspace_id, dataset_ids[0])
+    # An earlier refresh that has already completed
+    server.state.refreshes[dataset_ids[0]] = [time.time() - 60]
+
+    get_refresh_history = client.get_refresh_history
+    calls = []
+
+    def flaky(workspace_id, dataset_id, top = None):
+        calls.append(dataset_id)
+        if len(calls) == 1: return None
+        return get_refresh_history(workspace_id, dataset_id, top)
+
+    client.get_refresh_history = flaky
+    started = time.monotonic()
+    results = pbirest.refresh_datasets([dataset], capacities = {}, initial_delay = 0.05, max_delay = 0.1, client = client)
+
+    # The dataset is only reported once its new refresh completed, not from the earlier one
+    assert results[0]["status"] == "Completed"
+    assert time.monotonic() - started >= 0.4
+    assert len(server.state.refreshes[dataset_ids[0]]) == 2
+
+def test_a_history_that_never_comes_back_fails_without_a_trigger(stand_in):
+    server, client = stand_in(workspaces = 1, datasets = 1)
+    workspace_id, dataset_ids = _datasets(server)
+    client.get_refresh_history = lambda *args: None
+
+    results = pbirest.refresh_datasets([(workspace_id, dataset_ids[0])], capacities = {}, initial_delay = 0.01, max_delay = 0.01, client = client)
+
+    assert results[0]["status"] == "Failed"
+    assert dataset_ids[0] not in server.state.refreshes
@@ -0,0 +1,64 @@
+import pbirest
+
+def test_sync_moves_the_watermark_over_successful_windows(stand_in, tmp_path):
+    server, client = stand_in(events_per_day = 24 * 4)
+    store = pbirest.AuditLogStore(str(tmp_path / "audit.db"))
+
+    result = pbirest.sync_audit_logs(store, start_date = "2024-01-01 03:00:00", end_date = "2024-01-01 08:59:59", window_hours = 1, client = client)
+
+    assert result["failed"] == []
+    assert result["inserted"] == 6 * 4
+    assert store.get_watermark() == "2024-01-01 08:59:59"
+    store.close()
+
+def test_sync_overlap_refetches_without_duplicates(stand_in, tmp_path):
+    server, client = stand_in(events_per_day = 24 * 4)
+    store = pbirest.AuditLogStore(str(tmp_path / "audit.db"))
+    pbirest.sync_audit_logs(store, start_date = "2024-01-01 00:00:00", end_date = "2024-01-01 05:59:59", window_hours = 1, client = client)
+    requests = server.stats["requests"]
+
+    again = pbirest.sync_audit_logs(store, end_date = "2024-01-01 05:59:59", window_hours = 1, client = client)
+    assert again["inserted"] == 0
+    assert server.stats["requests"] > requests
+
+    later = pbirest.sync_audit_logs(store, end_date = "2024-01-01 09:59:59", window_hours = 1, client = client)
+    assert later["inserted"] == 4 * 4
+    assert later["watermark"] == "2024-01-01 09:59:59"
+    assert store.count() == 10 * 4
+    store.close()
+
+def test_sync_keeps_the_watermark_before_a_failed_window(stand_in, tmp_path):
+    server, client = stand_in(events_per_day = 24)
+    store = pbirest.AuditLogStore(str(tmp_path / "audit.db"))
+    iter_audit_logs = client.iter_audit_logs
+
+    def failing(start_date, end_date, *args, **kwargs):
+        if start_date == "2024-01-01 02:00:00": raise pbirest.AuditLogError(500, "Internal error")
+        return iter_audit_logs(start_date, end_date, *args, **kwargs)
+
+    client.iter_audit_logs = failing
+    result = pbirest.sync_audit_logs(store, start_date = "2024-01-01 00:00:00", end_date = "2024-01-01 03:59:59", window_hours = 1, backoff = 0, client = client)
+
+    assert result["failed"] == [("2024-01-01 02:00:00", "2024-01-01 02:59:59")]
+    assert store.get_watermark() == "2024-01-01 01:59:59"
+    store.close()
+
+class _RecordingStore(pbirest.AuditLogStore):
+    def __init__(self, path):
+        super().__init__(path)
+        self.batches = []
+
+    def insert_events(self, events, batch_size = 5000):
+        self.batches.append(len(events))
+        return super().insert_events(events, batch_size)
+
+def test_sync_inserts_each_window_as_it_arrives(stand_in, tmp_path):
+    server, client = stand_in(events_per_day = 24 * 5)
+    store = _RecordingStore(str(tmp_path / "audit.db"))
+
+    result = pbirest.sync_audit_logs(store, start_date = "2024-01-01 00:00:00", end_date = "2024-01-01 11:59:59", window_hours = 1, workers = 3, client = client)
+
+    assert store.batches == [5] * 12
+    assert result["inserted"] == 12 * 5
+    assert result["watermark"] == "2024-01-01 11:59:59"
+    store.close()